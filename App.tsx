@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useMemo } from 'react';
 import useWebSocket, { ReadyState } from 'react-use-websocket';
 import { ConfigurationScreen } from './components/ConfigurationScreen';
 import { ChatInterface } from './components/ChatInterface';
@@ -10,6 +10,20 @@ import type {
 } from './types';
 import { WEBSOCKET_URL } from './constants';
 
+const frameDecoder = new TextDecoder();
+
+// The server sends JSON as binary frames; older servers send text frames
+const parseServerFrame = (event: MessageEvent | null): unknown => {
+  if (!event) return null;
+  try {
+    const text = event.data instanceof ArrayBuffer ? frameDecoder.decode(event.data) : event.data;
+    return JSON.parse(text);
+  } catch (error) {
+    console.error('Failed to parse WebSocket frame:', error);
+    return null;
+  }
+};
+
 const App: React.FC = () => {
   const [isConfigured, setIsConfigured] = useState<boolean>(false);
   const [configData, setConfigData] = useState<ConfigData | null>(null);
@@ -24,76 +38,86 @@ const App: React.FC = () => {
   const [activeSection, setActiveSection] = useState<string>('gemini');
   const [isAddingRepo, setIsAddingRepo] = useState(false);
 
-  const { sendMessage, lastJsonMessage, readyState } = useWebSocket(WEBSOCKET_URL, {
+  const { sendMessage, lastMessage, readyState } = useWebSocket(WEBSOCKET_URL, {
     shouldReconnect: (_closeEvent) => true,
     reconnectAttempts: 10,
     reconnectInterval: 3000,
+    onOpen: (event) => {
+      // Receive binary frames as ArrayBuffer so they can be decoded synchronously
+      (event.target as WebSocket).binaryType = 'arraybuffer';
+    },
   });
+  const lastJsonMessage = useMemo(() => parseServerFrame(lastMessage), [lastMessage]);
 
   useEffect(() => {
     if (lastJsonMessage) {
-      const message = lastJsonMessage as ServerToClientMessage;
+      // The server may coalesce several messages into a single frame as an array
+      const messages = (Array.isArray(lastJsonMessage)
+        ? lastJsonMessage
+        : [lastJsonMessage]) as ServerToClientMessage[];
       
-      switch (message.type) {
-        case 'CONFIG_SUCCESS':
-          setIsConfigured(true);
-          setSystemMessage('Configuration successful. You can now chat with the agent.');
-          break;
+      for (const message of messages) {
+        switch (message.type) {
+          case 'CONFIG_SUCCESS':
+            setIsConfigured(true);
+            setSystemMessage('Configuration successful. You can now chat with the agent.');
+            break;
           
-        case 'CONFIG_ERROR':
-          setSystemMessage(`Configuration Error: ${message.payload.message}`);
-          setIsConfigured(false);
-          break;
+          case 'CONFIG_ERROR':
+            setSystemMessage(`Configuration Error: ${message.payload.message}`);
+            setIsConfigured(false);
+            break;
           
-        case 'FILE_TREE_DATA':
-          setFileTree(message.payload.tree);
-          setIsFileTreeLoading(false);
-          setFileTreeError(null);
+          case 'FILE_TREE_DATA':
+            setFileTree(message.payload.tree);
+            setIsFileTreeLoading(false);
+            setFileTreeError(null);
           
-          // Update selected repository information
-          if (message.payload.repository) {
-            setSelectedRepository(message.payload.repository);
-          }
-          break;
+            // Update selected repository information
+            if (message.payload.repository) {
+              setSelectedRepository(message.payload.repository);
+            }
+            break;
           
-        case 'FILE_TREE_ERROR':
-          setFileTreeError(message.payload.message);
-          setIsFileTreeLoading(false);
-          setFileTree(null);
-          break;
+          case 'FILE_TREE_ERROR':
+            setFileTreeError(message.payload.message);
+            setIsFileTreeLoading(false);
+            setFileTree(null);
+            break;
           
-        case 'NEW_CHAT_MESSAGE':
-          setChatMessages((prevMessages) => [...prevMessages, message.payload]);
-          break;
+          case 'NEW_CHAT_MESSAGE':
+            setChatMessages((prevMessages) => [...prevMessages, message.payload]);
+            break;
           
-        case 'AGENT_TYPING':
-          console.log('Agent typing status:', message.payload.isTyping);
-          break;
+          case 'AGENT_TYPING':
+            console.log('Agent typing status:', message.payload.isTyping);
+            break;
           
-        case 'REPOSITORIES_LIST':
-          setRepositories(message.payload.repositories);
-          if (message.payload.repositories.length > 0 && !selectedRepositoryId) {
-            setSelectedRepositoryId(message.payload.repositories[0].id);
-          }
-          break;
+          case 'REPOSITORIES_LIST':
+            setRepositories(message.payload.repositories);
+            if (message.payload.repositories.length > 0 && !selectedRepositoryId) {
+              setSelectedRepositoryId(message.payload.repositories[0].id);
+            }
+            break;
           
-        case 'REPOSITORY_ACTION_SUCCESS':
-          if (message.payload.action === 'select' && message.payload.repository_id) {
-            setSelectedRepositoryId(message.payload.repository_id);
-          } else if (message.payload.repository) {
-            // For add/update repository actions
-            setSystemMessage(`Repository ${message.payload.action === 'add' ? 'added' : 'updated'} successfully`);
-          } else if (message.payload.action === 'delete') {
-            setSystemMessage('Repository deleted successfully');
-          }
-          break;
+          case 'REPOSITORY_ACTION_SUCCESS':
+            if (message.payload.action === 'select' && message.payload.repository_id) {
+              setSelectedRepositoryId(message.payload.repository_id);
+            } else if (message.payload.repository) {
+              // For add/update repository actions
+              setSystemMessage(`Repository ${message.payload.action === 'add' ? 'added' : 'updated'} successfully`);
+            } else if (message.payload.action === 'delete') {
+              setSystemMessage('Repository deleted successfully');
+            }
+            break;
           
-        case 'REPOSITORY_ACTION_ERROR':
-          setSystemMessage(`Repository action error: ${message.payload.message}`);
-          break;
+          case 'REPOSITORY_ACTION_ERROR':
+            setSystemMessage(`Repository action error: ${message.payload.message}`);
+            break;
           
-        default:
-          console.warn('Received unknown WebSocket message:', message);
+          default:
+            console.warn('Received unknown WebSocket message:', message);
+        }
       }
     }
   }, [lastJsonMessage]);
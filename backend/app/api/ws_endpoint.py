@@ -1,14 +1,99 @@
 """
 WebSocket API endpoints
 """
-import json
 import logging
+from typing import Optional, Union
+import msgpack
+import orjson
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from ..core.ws_manager import manager
-from functools import partial
+from pydantic import ValidationError
+from ..core.ws_manager import CachedMessage, ConnectionManager, manager
+from ..schemas.ws_schemas import CLIENT_MESSAGE_ADAPTER, ClientMessage
+
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Message type -> ConnectionManager handler, built once at import time
+HANDLERS = {
+    "SUBMIT_CONFIG": ConnectionManager.handle_submit_config,
+    "FETCH_FILES": ConnectionManager.handle_fetch_files,
+    "SEND_CHAT_MESSAGE": ConnectionManager.handle_chat_message,
+    "ADD_REPOSITORY": ConnectionManager.handle_add_repository,
+    "UPDATE_REPOSITORY": ConnectionManager.handle_update_repository,
+    "DELETE_REPOSITORY": ConnectionManager.handle_delete_repository,
+    "SELECT_REPOSITORY": ConnectionManager.handle_select_repository,
+    "GET_ISSUES": ConnectionManager.handle_get_issues,
+    "GET_ASSIGNED_ISSUES": ConnectionManager.handle_get_assigned_issues,
+    "CREATE_ISSUE": ConnectionManager.handle_create_issue,
+    "GET_BRANCHES": ConnectionManager.handle_get_branches,
+    "CREATE_BRANCH": ConnectionManager.handle_create_branch,
+    "PUSH_FILE": ConnectionManager.handle_push_file,
+    "PUSH_FILES": ConnectionManager.handle_push_files,
+    "CREATE_PULL_REQUEST": ConnectionManager.handle_create_pull_request,
+    "GET_PULL_REQUESTS": ConnectionManager.handle_get_pull_requests,
+}
+
+# Error reply for each message type, matching what its handler sends when the payload is unusable
+ERROR_TYPES = {
+    "SUBMIT_CONFIG": "CONFIG_ERROR",
+    "FETCH_FILES": "FILE_TREE_ERROR",
+    "ADD_REPOSITORY": "REPOSITORY_ACTION_ERROR",
+    "UPDATE_REPOSITORY": "REPOSITORY_ACTION_ERROR",
+    "DELETE_REPOSITORY": "REPOSITORY_ACTION_ERROR",
+    "SELECT_REPOSITORY": "REPOSITORY_ACTION_ERROR",
+    "GET_ISSUES": "GITHUB_ACTION_ERROR",
+    "GET_ASSIGNED_ISSUES": "GITHUB_ACTION_ERROR",
+    "CREATE_ISSUE": "GITHUB_ACTION_ERROR",
+    "GET_BRANCHES": "GITHUB_ACTION_ERROR",
+    "CREATE_BRANCH": "GITHUB_ACTION_ERROR",
+    "PUSH_FILE": "GITHUB_ACTION_ERROR",
+    "PUSH_FILES": "GITHUB_ACTION_ERROR",
+    "CREATE_PULL_REQUEST": "GITHUB_ACTION_ERROR",
+    "GET_PULL_REQUESTS": "GITHUB_ACTION_ERROR",
+}
+
+# Encoded once per wire format and reused for every PING
+PING_RESPONSE = CachedMessage({"type": "PONG"})
+
+# Every message type the endpoint understands; clients are expected to send them uppercase
+VALID_TYPES = frozenset(HANDLERS) | {"PING", "PONG"}
+
+# Canonical types already reported as sent in another casing, so each is logged only once
+_warned_types = set()
+
+
+def normalize_message_type(message_type: str) -> str:
+    """Uppercase a message type that was not sent in canonical form"""
+    normalized = message_type.upper()
+    if normalized in VALID_TYPES and normalized not in _warned_types:
+        _warned_types.add(normalized)
+        logger.warning("Message type %r should be sent as %r", message_type, normalized)
+    return normalized
+
+
+def parse_client_message(data: Union[str, bytes], use_msgpack: bool = False) -> ClientMessage:
+    """Validate a frame as a ClientMessage, retrying once with an uppercased type"""
+    try:
+        if use_msgpack:
+            return CLIENT_MESSAGE_ADAPTER.validate_python(msgpack.unpackb(data))
+        return CLIENT_MESSAGE_ADAPTER.validate_json(data)
+    except ValidationError:
+        raw = msgpack.unpackb(data) if use_msgpack else orjson.loads(data)
+        message_type = raw.get("type") if isinstance(raw, dict) else None
+        if not isinstance(message_type, str) or message_type in VALID_TYPES:
+            raise
+        return CLIENT_MESSAGE_ADAPTER.validate_python({**raw, "type": normalize_message_type(message_type)})
+
+
+def raw_message_type(data: Union[str, bytes], use_msgpack: bool = False) -> Optional[str]:
+    """Uppercased type of a frame that failed validation, if it has one"""
+    try:
+        raw = msgpack.unpackb(data) if use_msgpack else orjson.loads(data)
+    except ValueError:
+        return None
+    message_type = raw.get("type") if isinstance(raw, dict) else None
+    return message_type.upper() if isinstance(message_type, str) else None
+
 
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
@@ -19,52 +104,55 @@ async def websocket_endpoint(websocket: WebSocket):
     try:
         # Process messages while the connection is active
         while True:
-            # Wait for a message from the client
-            data = await websocket.receive_text()
+            # Wait for a message from the client (text or binary frame)
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            data = frame.get("bytes") or frame.get("text")
             
-            # Parse the message
+            # Parse and validate the message; binary frames from MessagePack clients are MessagePack
+            state = manager.clients.get(client_id)
+            use_msgpack = state is not None and state.msgpack and isinstance(data, bytes)
             try:
-                message = json.loads(data)
-                message_type = message.get("type", "").upper()
-                payload = message.get("payload", {})
+                message = parse_client_message(data, use_msgpack)
+                message_type = message.type
                 
-                logger.info(f"Received message from {client_id}: {message_type}")
-                ws_router = dict(
-                    SUBMIT_CONFIG=partial(manager.handle_submit_config, client_id),
-                    FETCH_FILES=partial(manager.handle_fetch_files, client_id),
-                    SEND_CHAT_MESSAGE=partial(manager.handle_chat_message, client_id),
-                    ADD_REPOSITORY=partial(manager.handle_add_repository, client_id),
-                    UPDATE_REPOSITORY=partial(manager.handle_update_repository, client_id),
-                    DELETE_REPOSITORY=partial(manager.handle_delete_repository, client_id),
-                    SELECT_REPOSITORY=partial(manager.handle_select_repository, client_id),
-                    GET_ISSUES=partial(manager.handle_get_issues, client_id),
-                    GET_ASSIGNED_ISSUES=partial(manager.handle_get_assigned_issues, client_id),
-                    CREATE_ISSUE=partial(manager.handle_create_issue, client_id),
-                    GET_BRANCHES=partial(manager.handle_get_branches, client_id),
-                    CREATE_BRANCH=partial(manager.handle_create_branch, client_id),
-                    PUSH_FILE=partial(manager.handle_push_file, client_id),
-                    PUSH_FILES=partial(manager.handle_push_files, client_id),
-                    CREATE_PULL_REQUEST=partial(manager.handle_create_pull_request, client_id),
-                    GET_PULL_REQUESTS=partial(manager.handle_get_pull_requests, client_id)
-                )
-                if message_type in ws_router:
-                    await ws_router[message_type](payload)
+                logger.debug("Received message from %s: %s", client_id, message_type)
+                handler = HANDLERS.get(message_type)
+                if handler is not None:
+                    # Handlers take plain dicts; leave out fields the client did not send
+                    await handler(manager, client_id, message.payload.model_dump(exclude_unset=True))
                 elif message_type == "PING":
-                    await websocket.send_text(json.dumps({"type": "PONG"}))
-                elif message_type == "PONG":
-                    logger.info(f"Received PONG from {client_id}")
+                    await manager.send_cached(PING_RESPONSE, client_id)
                 else:
-                    logger.warning(f"Unknown message type: {message_type}")
+                    logger.debug("Received PONG from %s", client_id)
                     
-            except json.JSONDecodeError:
-                logger.error(f"Invalid JSON received: {data}")
+            except ValidationError as e:
+                # Payloads may carry tokens, so only the failing fields are logged
+                fields = ", ".join(".".join(map(str, error["loc"])) or error["type"] for error in e.errors())
+                logger.warning("Invalid message from %s: %s", client_id, fields)
+                
+                # Answer with the handler's error message so the client is not left waiting
+                error_type = ERROR_TYPES.get(raw_message_type(data, use_msgpack))
+                if error_type is not None:
+                    await manager.send_personal_message({
+                        "type": error_type,
+                        "payload": {"message": f"Invalid message: {fields}"}
+                    }, client_id)
+            except ValueError:
+                # orjson.JSONDecodeError and msgpack's unpack errors are ValueErrors; frames may
+                # carry tokens, so only their kind and size are logged
+                logger.error(
+                    "Invalid %s frame received from %s (length %d)",
+                    "binary" if isinstance(data, bytes) else "text", client_id, len(data or b"")
+                )
             except Exception as e:
-                logger.error(f"Error processing message: {e}")
+                logger.error("Error processing message: %s", e)
     
     except WebSocketDisconnect:
         # Handle client disconnect
         manager.disconnect(client_id)
     except Exception as e:
         # Handle any other exceptions
-        logger.error(f"WebSocket error: {e}")
+        logger.error("WebSocket error: %s", e)
         manager.disconnect(client_id)
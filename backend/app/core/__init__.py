@@ -1,9 +1,11 @@
 """
 Core module initialization
 """
+from .http_client import HTTPClientManager
 from .mongodb import MongoDBManager
 from .ws_manager import ConnectionManager, manager
 __all__ = [
+    "HTTPClientManager",
     "MongoDBManager",
     "ConnectionManager",
     "manager"
@@ -0,0 +1,50 @@
+"""
+In-process caching helpers
+"""
+import functools
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+def async_lru_ttl(key: Callable[..., Hashable], maxsize: int = 1024, ttl: float = 60.0):
+    """Cache results of a coroutine function in an LRU with a time-to-live
+
+    Args:
+        key: Builds the cache key from the call arguments
+        maxsize: Maximum number of cached results
+        ttl: Seconds a cached result stays valid
+
+    Falsy results are not cached, so failed lookups are retried on the next
+    call. The wrapper exposes `invalidate(*args, **kwargs)` to drop the entry
+    for a set of arguments and `cache_clear()` to drop everything.
+    """
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            cache_key = key(*args, **kwargs)
+            now = time.monotonic()
+            entry = entries.get(cache_key)
+            if entry is not None:
+                if now - entry[0] < ttl:
+                    entries.move_to_end(cache_key)
+                    return entry[1]
+                del entries[cache_key]
+
+            result = await func(*args, **kwargs)
+            if result:
+                entries[cache_key] = (now, result)
+                if len(entries) > maxsize:
+                    entries.popitem(last=False)
+            return result
+
+        def invalidate(*args, **kwargs) -> None:
+            entries.pop(key(*args, **kwargs), None)
+
+        wrapper.invalidate = invalidate
+        wrapper.cache_clear = entries.clear
+        return wrapper
+
+    return decorator
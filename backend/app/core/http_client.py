@@ -0,0 +1,43 @@
+"""
+Shared HTTP client for direct GitHub API calls
+"""
+import importlib.util
+import logging
+from typing import Optional
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the optional h2 package (installed by httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+class HTTPClientManager:
+    """Owns one pooled httpx.AsyncClient shared by every request"""
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Get the shared client, creating it on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(max_keepalive_connections=50),
+                timeout=httpx.Timeout(30.0),
+                # Renamed or transferred repositories answer with a redirect to their new location
+                follow_redirects=True,
+            )
+            logger.debug("Created shared HTTP client (http2=%s)", HTTP2_AVAILABLE)
+        return self._client
+
+    async def close(self):
+        """Close the shared client and its pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            logger.info("HTTP client closed")
+
+
+# Create a singleton instance
+http_client = HTTPClientManager()
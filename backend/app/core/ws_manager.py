@@ -1,80 +1,391 @@
 """
 WebSocket connection manager
 """
-import json
+import hashlib
 import logging
-import uuid
-from typing import Dict, List, Any, Optional
+import time
+import secrets
+from typing import Dict, List, Any, Optional, Tuple, Union
 import asyncio
+import msgpack
+import orjson
 from fastapi import WebSocket, WebSocketDisconnect
+from starlette.websockets import WebSocketState
 from ..models.models import db
 from ..models.github_model import github_model
 from ..core.mongodb import mongodb
+from pydantic import BaseModel
 from ..schemas.ws_schemas import (
-    ChatMessage, MessageSender, FileNode, Repository, 
-    RepositoryRe            # Retrieve repository from database
-            repository = await github_model.get_repository(client_id, repository_id)
-            
-            if not repository:
-                await self.send_personal_message({
-                    "type": "REPOSITORY_ACTION_ERROR",
-                    "payload": {"message": "Repository not found"}
-                }, client_id)
-                returnfrom ..services.github_service import GitHubService
+    ChatMessage, MessageSender, Repository, 
+    RepositoryResponse, AgentTypingMessage, ConfigSuccessMessage,
+    FileTreeDataMessage, json_envelope_prefix
+)
+from ..services.github_service import GitHubService
 from ..services.ai_service import AIAgentService
 
 logger = logging.getLogger(__name__)
 
+# Seconds to wait for further disconnects before flushing a batch to MongoDB
+DISCONNECT_FLUSH_DELAY = 0.02
+
+# Seconds a repository document stays in the per-client cache
+REPOSITORY_CACHE_TTL = 5.0
+
+# Editable repository fields and the defaults applied when they are omitted
+REPOSITORY_FIELDS = (
+    ("name", None), ("url", None), ("host", "github.com"), ("owner", None),
+    ("repo", None), ("branch", "main"), ("token", None),
+)
+
+# Seconds a client's writer waits for more outgoing messages before sending a frame
+WRITE_DELAY = 0.002
+
+# Most messages coalesced into a single frame
+MAX_MESSAGES_IN_FRAME = 32
+
+# Most encoded messages waiting for a client's writer; a client this far behind is disconnected
+OUTBOX_SIZE = 256
+
+# A server message: a plain dict or one of the ws_schemas message models
+OutgoingMessage = Union[Dict[str, Any], BaseModel]
+
+# WebSocket subprotocol a client offers to receive MessagePack instead of JSON
+MSGPACK_SUBPROTOCOL = "msgpack"
+
+
+def _encode_default(obj: Any) -> Any:
+    """Turn pydantic models (and, for MessagePack, dataclasses) into plain data"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    fields = getattr(obj, "__dataclass_fields__", None)
+    if fields is None:
+        raise TypeError(f"Cannot serialize {type(obj).__name__}")
+    return {name: getattr(obj, name) for name in fields}
+
+
+def dumps(message: Any) -> bytes:
+    """Encode a message as JSON with orjson; ws_schemas models may be passed directly"""
+    return orjson.dumps(message, default=_encode_default)
+
+
+def packb(message: Any) -> bytes:
+    """Encode a message as MessagePack"""
+    return msgpack.packb(message, default=_encode_default, use_bin_type=True)
+
+
+class CachedMessage:
+    """A server message encoded at most once per wire format
+    
+    Send the same instance to any number of clients; each format is
+    serialized on first use and the bytes are reused afterwards.
+    """
+    __slots__ = ("message", "_json", "_msgpack")
+    
+    def __init__(self, message: OutgoingMessage):
+        self.message = message
+        self._json: Optional[bytes] = None
+        self._msgpack: Optional[bytes] = None
+    
+    def encoded(self, use_msgpack: bool) -> bytes:
+        """Get the encoded message for a JSON or MessagePack client"""
+        if use_msgpack:
+            if self._msgpack is None:
+                self._msgpack = packb(self.message)
+            return self._msgpack
+        if self._json is None:
+            self._json = dumps(self.message)
+        return self._json
+
+
+def _msgpack_array_header(length: int) -> bytes:
+    """MessagePack array header; packed items appended to it form the array"""
+    if length < 16:
+        return bytes((0x90 | length,))
+    return b"\xdc" + length.to_bytes(2, "big")
+
+
+# Constant messages, encoded once for all clients
+TYPING_ON = CachedMessage(AgentTypingMessage(payload={"isTyping": True}))
+TYPING_OFF = CachedMessage(AgentTypingMessage(payload={"isTyping": False}))
+CONFIG_SUCCESS = CachedMessage(ConfigSuccessMessage())
+
+
+def _repository_unchanged(existing: Dict[str, Any], repo_data: Dict[str, Any]) -> bool:
+    """Check whether an update payload matches the stored repository"""
+    return all(
+        existing.get(field) == repo_data.get(field, default)
+        for field, default in REPOSITORY_FIELDS
+    )
+
+
+class ClientState:
+    """Per-connection state for a WebSocket client"""
+    __slots__ = ("ws", "selected_repo", "repo_cache", "repos", "out_q", "writer_task", "msgpack")
+    
+    def __init__(self, ws: WebSocket, use_msgpack: bool = False):
+        self.ws = ws
+        # Whether the client negotiated MessagePack frames instead of JSON
+        self.msgpack = use_msgpack
+        # Encoded outgoing messages, drained by a single writer task
+        self.out_q: asyncio.Queue = asyncio.Queue(maxsize=OUTBOX_SIZE)
+        self.writer_task: Optional[asyncio.Task] = None
+        # ID of the repository the client is currently viewing
+        self.selected_repo: Optional[str] = None
+        # Repository documents keyed by repository_id -> (cached_at, repository)
+        self.repo_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        # Repository listing (no tokens), hydrated on first use
+        self.repos: Optional[List[Dict[str, Any]]] = None
+    
+    def encode(self, message: OutgoingMessage) -> bytes:
+        """Encode a message in the client's negotiated format"""
+        return packb(message) if self.msgpack else dumps(message)
+    
+    def enqueue(self, raw: bytes) -> bool:
+        """Queue one encoded message, starting the writer on first use
+        
+        Returns False if the outbox is full.
+        """
+        try:
+            self.out_q.put_nowait(raw)
+        except asyncio.QueueFull:
+            return False
+        if self.writer_task is None:
+            self.writer_task = asyncio.create_task(self._write_loop())
+        return True
+    
+    def close(self) -> None:
+        """Stop the writer, dropping anything still queued"""
+        if self.writer_task is not None:
+            self.writer_task.cancel()
+            self.writer_task = None
+    
+    async def _write_loop(self) -> None:
+        """Send queued messages, coalescing those queued together into one array frame"""
+        queue = self.out_q
+        try:
+            while True:
+                batch = [await queue.get()]
+                if queue.qsize() < MAX_MESSAGES_IN_FRAME - 1:
+                    await asyncio.sleep(WRITE_DELAY)
+                while len(batch) < MAX_MESSAGES_IN_FRAME and not queue.empty():
+                    batch.append(queue.get_nowait())
+                if len(batch) == 1:
+                    frame = batch[0]
+                elif self.msgpack:
+                    frame = _msgpack_array_header(len(batch)) + b"".join(batch)
+                else:
+                    frame = b"[" + b",".join(batch) + b"]"
+                await self.ws.send_bytes(frame)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.debug("WebSocket writer stopped: %s", e)
+
 
 class ConnectionManager:
     """WebSocket connection manager"""
     
     def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
+        self.clients: Dict[str, ClientState] = {}
         self.ai_service = AIAgentService()
-        # Track selected repository for each client
-        self.selected_repositories: Dict[str, str] = {}
+        # Digest of the API key the AI service was last configured with
+        self._ai_token_hash: Optional[bytes] = None
+        # Disconnected client IDs waiting to be marked inactive in MongoDB
+        self._disconnect_queue: asyncio.Queue = asyncio.Queue()
+        self._disconnect_worker: Optional[asyncio.Task] = None
+        # Closes of slow sockets still in flight
+        self._close_tasks: set = set()
+    
+    async def start(self) -> None:
+        """Start the background worker that records disconnects"""
+        if self._disconnect_worker is None:
+            self._disconnect_worker = asyncio.create_task(self._drain_disconnects())
+    
+    async def stop(self) -> None:
+        """Stop the background worker and flush pending disconnects"""
+        if self._disconnect_worker is not None:
+            self._disconnect_worker.cancel()
+            try:
+                await self._disconnect_worker
+            except asyncio.CancelledError:
+                pass
+            self._disconnect_worker = None
+        client_ids = []
+        while not self._disconnect_queue.empty():
+            client_ids.append(self._disconnect_queue.get_nowait())
+        if client_ids:
+            await db.remove_connections(client_ids)
+    
+    async def _drain_disconnects(self) -> None:
+        """Mark disconnected clients inactive, batching disconnects that arrive together"""
+        while True:
+            client_ids = [await self._disconnect_queue.get()]
+            await asyncio.sleep(DISCONNECT_FLUSH_DELAY)
+            while not self._disconnect_queue.empty():
+                client_ids.append(self._disconnect_queue.get_nowait())
+            await db.remove_connections(client_ids)
     
     async def connect(self, websocket: WebSocket) -> str:
-        """Connect a new WebSocket client"""
-        await websocket.accept()
-        client_id = str(uuid.uuid4())
-        self.active_connections[client_id] = websocket
+        """Connect a new WebSocket client, negotiating MessagePack if offered"""
+        use_msgpack = MSGPACK_SUBPROTOCOL in websocket.scope.get("subprotocols", ())
+        await websocket.accept(subprotocol=MSGPACK_SUBPROTOCOL if use_msgpack else None)
+        client_id = secrets.token_hex(16)
+        self.clients[client_id] = ClientState(websocket, use_msgpack)
         await db.add_connection(client_id)
-        logger.info(f"Client connected: {client_id}")
+        logger.info("Client connected: %s", client_id)
         return client_id
     
+    def _get_selected_repository(self, client_id: str) -> Optional[str]:
+        """Get the ID of the repository a client is viewing"""
+        state = self.clients.get(client_id)
+        return state.selected_repo if state else None
+    
+    def _set_selected_repository(self, client_id: str, repository_id: Optional[str]) -> None:
+        """Set (or clear) the repository a client is viewing"""
+        state = self.clients.get(client_id)
+        if state:
+            state.selected_repo = repository_id
+    
+    async def _get_repository_cached(self, client_id: str, repository_id: str) -> Optional[Dict[str, Any]]:
+        """Get a repository, reusing a recently fetched document when possible"""
+        state = self.clients.get(client_id)
+        now = time.monotonic()
+        if state:
+            cached = state.repo_cache.get(repository_id)
+            if cached and now - cached[0] < REPOSITORY_CACHE_TTL:
+                return cached[1]
+        repository = await github_model.get_repository_internal(client_id, repository_id)
+        if repository and state:
+            state.repo_cache[repository_id] = (now, repository)
+        return repository
+    
+    def _invalidate_repository(self, client_id: str, repository_id: str) -> None:
+        """Drop a cached repository document"""
+        state = self.clients.get(client_id)
+        if state:
+            state.repo_cache.pop(repository_id, None)
+    
+    async def _get_repositories_cached(self, client_id: str) -> List[Dict[str, Any]]:
+        """Get the repository listing for a client, loading it on first use"""
+        state = self.clients.get(client_id)
+        if state and state.repos is not None:
+            return state.repos
+        repos = await github_model.get_repositories(client_id)
+        if state:
+            state.repos = repos
+        return repos
+    
+    def _upsert_repository_listing(self, client_id: str, repo: Dict[str, Any]) -> None:
+        """Apply an add/update to the cached listing (repositories are upserted by name)"""
+        state = self.clients.get(client_id)
+        if not state or state.repos is None:
+            return
+        repos = state.repos
+        for index, existing in enumerate(repos):
+            if existing["name"] == repo["name"]:
+                repos[index] = repo
+                return
+        repos.append(repo)
+    
+    def _remove_repository_listing(self, client_id: str, repository_id: str) -> None:
+        """Apply a delete to the cached listing"""
+        state = self.clients.get(client_id)
+        if not state or state.repos is None:
+            return
+        repos = state.repos
+        for index, existing in enumerate(repos):
+            if existing["id"] == repository_id:
+                del repos[index]
+                return
+    
     def disconnect(self, client_id: str) -> None:
         """Disconnect a WebSocket client"""
-        if client_id in self.active_connections:
-            del self.active_connections[client_id]
-        if client_id in self.selected_repositories:
-            del self.selected_repositories[client_id]
-        asyncio.create_task(db.remove_connection(client_id))
-        logger.info(f"Client disconnected: {client_id}")
-    
-    async def send_personal_message(self, message: Dict[str, Any], client_id: str) -> None:
-        """Send a message to a specific client"""
-        if client_id in self.active_connections:
-            await self.active_connections[client_id].send_json(message)
+        state = self.clients.pop(client_id, None)
+        if state:
+            state.close()
+        self._disconnect_queue.put_nowait(client_id)
+        logger.info("Client disconnected: %s", client_id)
+    
+    def _reap(self, client_id: str) -> None:
+        """Drop a client whose socket is no longer connected"""
+        state = self.clients.pop(client_id, None)
+        if state:
+            state.close()
+            self._disconnect_queue.put_nowait(client_id)
+            logger.debug("Reaped closed WebSocket for client %s", client_id)
+    
+    def _enqueue(self, client_id: str, state: ClientState, raw: bytes) -> None:
+        """Queue encoded bytes for a client, closing the connection if it has fallen too far behind"""
+        if state.enqueue(raw):
+            return
+        logger.warning("Outbox full for client %s, closing slow connection", client_id)
+        self._reap(client_id)
+        task = asyncio.create_task(self._close_slow_client(state.ws))
+        self._close_tasks.add(task)
+        task.add_done_callback(self._close_tasks.discard)
+    
+    async def _close_slow_client(self, websocket: WebSocket) -> None:
+        """Close a socket that stopped keeping up ("try again later")"""
+        try:
+            await websocket.close(code=1013)
+        except Exception as e:
+            logger.debug("Error closing slow WebSocket: %s", e)
+    
+    def _live_state(self, client_id: str) -> Optional[ClientState]:
+        """Get a client's state if its socket is still open, reaping it otherwise"""
+        state = self.clients.get(client_id)
+        if state is None:
+            return None
+        ws = state.ws
+        if ws.application_state != WebSocketState.CONNECTED or ws.client_state != WebSocketState.CONNECTED:
+            self._reap(client_id)
+            return None
+        return state
+    
+    async def send_personal_message(self, message: OutgoingMessage, client_id: str) -> None:
+        """Queue a message for a specific client"""
+        state = self._live_state(client_id)
+        if state:
+            self._enqueue(client_id, state, state.encode(message))
+    
+    async def _send_raw(self, raw: bytes, client_id: str) -> None:
+        """Queue an already JSON-encoded message for a specific JSON client"""
+        state = self._live_state(client_id)
+        if state:
+            self._enqueue(client_id, state, raw)
+    
+    async def send_cached(self, message: CachedMessage, client_id: str) -> None:
+        """Queue a cached message for a specific client"""
+        state = self._live_state(client_id)
+        if state:
+            self._enqueue(client_id, state, message.encoded(state.msgpack))
     
     async def handle_submit_config(self, client_id: str, payload: Dict[str, Any]) -> None:
         """Handle configuration submission"""
         try:
-            # Store configuration in the database
-            await db.update_connection_config(client_id, payload)
-            
-            # Configure AI service with the provided Gemini API key
-            self.ai_service.configure(payload.get("geminiToken", ""))
-            
-            # Process any repositories in the configuration
+            # Configure AI service with the provided Gemini API key, unless it is unchanged
+            token = payload.get("geminiToken", "")
+            token_hash = hashlib.blake2b(token.encode(), digest_size=16).digest()
+            if token_hash != self._ai_token_hash:
+                self.ai_service.configure(token)
+                self._ai_token_hash = token_hash
+            
+            # Store the configuration, upsert its repositories and load the
+            # client's repository listing concurrently
             repositories = payload.get("repositories", [])
+            _, added, repos = await asyncio.gather(
+                db.update_connection_config(client_id, payload),
+                github_model.add_repositories(client_id, repositories),
+                self._get_repositories_cached(client_id),
+            )
+            
             if repositories:
-                for repo_data in repositories:
-                    await github_model.add_repository(client_id, repo_data)
+                # The listing may have been read before the upserts landed
+                for repo in added:
+                    self._invalidate_repository(client_id, repo["id"])
+                    self._upsert_repository_listing(client_id, repo)
                 
-                # Get all repositories and send them back
-                repos = await github_model.get_repositories(client_id)
+                # Send all repositories back
                 await self.send_personal_message({
                     "type": "REPOSITORIES_LIST",
                     "payload": {"repositories": repos}
@@ -83,31 +394,35 @@ class ConnectionManager:
                 # Select the first repository by default
                 if repos and len(repos) > 0:
                     first_repo = repos[0]
-                    self.selected_repositories[client_id] = first_repo["id"]
+                    self._set_selected_repository(client_id, first_repo["id"])
                     
                     # Fetch file tree for the first repository
-                    repo_details = await github_model.get_repository(client_id, first_repo["id"])
+                    repo_details = await self._get_repository_cached(client_id, first_repo["id"])
                     if repo_details:
-                        await self.handle_fetch_files(client_id, {"repository_id": first_repo["id"]})
+                        await self.handle_fetch_files(
+                            client_id, {"repository_id": first_repo["id"]}, repository=repo_details
+                        )
             
             # Send success response
-            await self.send_personal_message({"type": "CONFIG_SUCCESS"}, client_id)
+            await self.send_cached(CONFIG_SUCCESS, client_id)
             
         except Exception as e:
-            logger.error(f"Error in handle_submit_config: {e}")
+            logger.error("Error in handle_submit_config: %s", e)
             await self.send_personal_message({
                 "type": "CONFIG_ERROR",
                 "payload": {"message": str(e)}
             }, client_id)
     
-    async def handle_fetch_files(self, client_id: str, payload: Dict[str, Any]) -> None:
-        """Handle file tree fetching"""
+    async def handle_fetch_files(self, client_id: str, payload: Dict[str, Any],
+                                 repository: Optional[Dict[str, Any]] = None) -> None:
+        """Handle file tree fetching
+        
+        Callers that already hold the repository document can pass it as
+        `repository` to skip the lookup.
+        """
         try:
             # Set typing indicator
-            await self.send_personal_message({
-                "type": "AGENT_TYPING",
-                "payload": {"isTyping": True}
-            }, client_id)
+            await self.send_cached(TYPING_ON, client_id)
             
             # Get repository ID from payload
             repository_id = payload.get("repository_id")
@@ -119,8 +434,9 @@ class ConnectionManager:
                 }, client_id)
                 return
             
-            # Retrieve repository details from database
-            repository = await github_model.get_repository(client_id, repository_id)
+            # Retrieve repository details unless the caller provided them
+            if repository is None:
+                repository = await self._get_repository_cached(client_id, repository_id)
             
             if not repository:
                 await self.send_personal_message({
@@ -130,36 +446,40 @@ class ConnectionManager:
                 return
             
             # Update selected repository for this client
-            self.selected_repositories[client_id] = repository_id
+            self._set_selected_repository(client_id, repository_id)
                 
             # Fetch the file tree using repository details
             file_tree = await github_model.fetch_file_tree(repository)
             
-            # Send the file tree to the client along with repository info
-            await self.send_personal_message({
-                "type": "FILE_TREE_DATA",
-                "payload": {
-                    "tree": [node.model_dump() for node in file_tree],
-                    "repository": {
-                        "id": repository["id"],
-                        "name": repository["name"],
-                        "url": repository["url"],
-                        "host": repository["host"],
-                        "owner": repository["owner"],
-                        "repo": repository["repo"],
-                        "branch": repository["branch"]
-                    }
-                }
-            }, client_id)
-            
-            # Turn off typing indicator
-            await self.send_personal_message({
-                "type": "AGENT_TYPING",
-                "payload": {"isTyping": False}
-            }, client_id)
+            # Send the file tree along with repository info and turn off the
+            # typing indicator. For JSON clients the tree is serialized
+            # straight to JSON and spliced into the envelope.
+            repository_info = {
+                "id": repository["id"],
+                "name": repository["name"],
+                "url": repository["url"],
+                "host": repository["host"],
+                "owner": repository["owner"],
+                "repo": repository["repo"],
+                "branch": repository["branch"]
+            }
+            state = self.clients.get(client_id)
+            if state and state.msgpack:
+                await self.send_personal_message({
+                    "type": "FILE_TREE_DATA",
+                    "payload": {"tree": file_tree, "repository": repository_info}
+                }, client_id)
+            else:
+                await self._send_raw(
+                    json_envelope_prefix(FileTreeDataMessage) + b'{"tree":'
+                    + orjson.dumps(file_tree)
+                    + b',"repository":' + orjson.dumps(repository_info) + b'}}',
+                    client_id
+                )
+            await self.send_cached(TYPING_OFF, client_id)
             
         except Exception as e:
-            logger.error(f"Error in handle_fetch_files: {e}")
+            logger.error("Error in handle_fetch_files: %s", e)
             await self.send_personal_message({
                 "type": "FILE_TREE_ERROR",
                 "payload": {"message": str(e)}
@@ -180,18 +500,15 @@ class ConnectionManager:
             )
             
             # Set typing indicator on
-            await self.send_personal_message({
-                "type": "AGENT_TYPING",
-                "payload": {"isTyping": True}
-            }, client_id)
+            await self.send_cached(TYPING_ON, client_id)
             
             # Get user context
             config = await db.get_connection_config(client_id) or {}
             
             # Add selected repository information to the context if available
-            repository_id = self.selected_repositories.get(client_id)
+            repository_id = self._get_selected_repository(client_id)
             if repository_id:
-                repository = await github_model.get_repository(client_id, repository_id)
+                repository = await self._get_repository_cached(client_id, repository_id)
                 if repository:
                     config["selected_repository"] = repository
             
@@ -205,41 +522,32 @@ class ConnectionManager:
                 text=response
             )
             
-            # Turn off typing indicator
-            await self.send_personal_message({
-                "type": "AGENT_TYPING",
-                "payload": {"isTyping": False}
-            }, client_id)
-            
-            # Send agent response
+            # Turn off typing indicator and send agent response
+            await self.send_cached(TYPING_OFF, client_id)
             await self.send_personal_message({
                 "type": "NEW_CHAT_MESSAGE",
                 "payload": agent_msg
             }, client_id)
             
         except Exception as e:
-            logger.error(f"Error in handle_chat_message: {e}")
+            logger.error("Error in handle_chat_message: %s", e)
             # Send error message
             error_msg = await db.add_message(
                 client_id=client_id,
                 sender=MessageSender.SYSTEM,
                 text=f"Error processing message: {str(e)}"
             )
+            # Send the error and turn off typing indicator
             await self.send_personal_message({
                 "type": "NEW_CHAT_MESSAGE",
                 "payload": error_msg
             }, client_id)
-            
-            # Turn off typing indicator
-            await self.send_personal_message({
-                "type": "AGENT_TYPING",
-                "payload": {"isTyping": False}
-            }, client_id)
+            await self.send_cached(TYPING_OFF, client_id)
     
     async def handle_add_repository(self, client_id: str, payload: Dict[str, Any]) -> None:
         """Handle adding a new repository"""
         try:
-            logger.info(f"Received ADD_REPOSITORY request for client {client_id} with payload: {payload}")
+            logger.debug("Received ADD_REPOSITORY request for client %s", client_id)
             repository_data = payload.get("repository")
             if not repository_data:
                 logger.error("Repository data is missing from payload")
@@ -249,11 +557,14 @@ class ConnectionManager:
                 }, client_id)
                 return
                 
-            # Validate repository before adding
-            logger.info(f"Validating repository: {repository_data.get('name')} ({repository_data.get('url')})")
-            is_valid = await GitHubService.validate_repository(repository_data)
+            # Validate repository before adding, loading the listing meanwhile
+            logger.debug("Validating repository: %s (%s)", repository_data.get('name'), repository_data.get('url'))
+            is_valid, _ = await asyncio.gather(
+                GitHubService.validate_repository(repository_data),
+                self._get_repositories_cached(client_id),
+            )
             if not is_valid:
-                logger.error(f"Repository validation failed: {repository_data.get('name')} ({repository_data.get('url')})")
+                logger.error("Repository validation failed: %s (%s)", repository_data.get('name'), repository_data.get('url'))
                 await self.send_personal_message({
                     "type": "REPOSITORY_ACTION_ERROR",
                     "payload": {"message": "Invalid repository or unable to access with provided token"}
@@ -262,28 +573,33 @@ class ConnectionManager:
             
             # Add repository to database
             repo = await github_model.add_repository(client_id, repository_data)
-            logger.info(f"Repository added successfully: {repo.get('name')} ({repo.get('url')})")
-            logger.debug(f"Repository data: {repo}")
+            self._invalidate_repository(client_id, repo["id"])
+            self._upsert_repository_listing(client_id, repo)
+            logger.info("Repository added successfully: %s (%s)", repo.get('name'), repo.get('url'))
+            logger.debug("Repository data: %s", repo)
             # Send success response
             await self.send_personal_message({
                 "type": "REPOSITORY_ACTION_SUCCESS",
                 "payload": {"repository": repo, "action": "add"}
             }, client_id)
             
-            # Get all repositories and send updated list
-            repos = await github_model.get_repositories(client_id)
+            # Send updated list
+            repos = await self._get_repositories_cached(client_id)
             await self.send_personal_message({
                 "type": "REPOSITORIES_LIST",
                 "payload": {"repositories": repos}
             }, client_id)
             
             # If this is the first repository, select it and fetch its files
-            if not self.selected_repositories.get(client_id):
-                self.selected_repositories[client_id] = repo["id"]
-                await self.handle_fetch_files(client_id, {"repository_id": repo["id"]})
+            if not self._get_selected_repository(client_id):
+                self._set_selected_repository(client_id, repo["id"])
+                await self.handle_fetch_files(
+                    client_id, {"repository_id": repo["id"]},
+                    repository={**repo, "token": repository_data["token"]}
+                )
             
         except Exception as e:
-            logger.error(f"Error in handle_add_repository: {e}")
+            logger.error("Error in handle_add_repository: %s", e)
             await self.send_personal_message({
                 "type": "REPOSITORY_ACTION_ERROR",
                 "payload": {"message": str(e)}
@@ -301,6 +617,18 @@ class ConnectionManager:
                     "payload": {"message": "Repository ID and data are required"}
                 }, client_id)
                 return
+            
+            # Nothing to validate or store when the payload matches the stored repository
+            existing = await self._get_repository_cached(client_id, repository_id)
+            if existing and _repository_unchanged(existing, repository_data):
+                await self.send_personal_message({
+                    "type": "REPOSITORY_ACTION_SUCCESS",
+                    "payload": {
+                        "repository": {k: v for k, v in existing.items() if k != "token"},
+                        "action": "update"
+                    }
+                }, client_id)
+                return
                 
             # Validate repository before updating
             is_valid = await GitHubService.validate_repository(repository_data)
@@ -316,6 +644,8 @@ class ConnectionManager:
             
             # Update repository in database
             repo = await github_model.add_repository(client_id, repository_data)
+            self._invalidate_repository(client_id, repository_id)
+            self._upsert_repository_listing(client_id, repo)
             
             # Send success response
             await self.send_personal_message({
@@ -323,19 +653,22 @@ class ConnectionManager:
                 "payload": {"repository": repo, "action": "update"}
             }, client_id)
             
-            # Get all repositories and send updated list
-            repos = await github_model.get_repositories(client_id)
+            # Send updated list
+            repos = await self._get_repositories_cached(client_id)
             await self.send_personal_message({
                 "type": "REPOSITORIES_LIST",
                 "payload": {"repositories": repos}
             }, client_id)
             
             # If this was the selected repository, refresh file tree
-            if self.selected_repositories.get(client_id) == repository_id:
-                await self.handle_fetch_files(client_id, {"repository_id": repository_id})
+            if self._get_selected_repository(client_id) == repository_id:
+                await self.handle_fetch_files(
+                    client_id, {"repository_id": repository_id},
+                    repository={**repo, "token": repository_data["token"]}
+                )
             
         except Exception as e:
-            logger.error(f"Error in handle_update_repository: {e}")
+            logger.error("Error in handle_update_repository: %s", e)
             await self.send_personal_message({
                 "type": "REPOSITORY_ACTION_ERROR",
                 "payload": {"message": str(e)}
@@ -353,8 +686,14 @@ class ConnectionManager:
                 }, client_id)
                 return
             
-            # Delete repository from database
+            # Delete repository from database, forgetting its cached validation
+            repository = await self._get_repository_cached(client_id, repository_id)
+            if repository:
+                GitHubService.validate_repository.invalidate(repository)
             success = await github_model.delete_repository(client_id, repository_id)
+            self._invalidate_repository(client_id, repository_id)
+            if success:
+                self._remove_repository_listing(client_id, repository_id)
             
             if not success:
                 await self.send_personal_message({
@@ -369,22 +708,22 @@ class ConnectionManager:
                 "payload": {"repository_id": repository_id, "action": "delete"}
             }, client_id)
             
-            # Get all repositories and send updated list
-            repos = await github_model.get_repositories(client_id)
+            # Send updated list
+            repos = await self._get_repositories_cached(client_id)
             await self.send_personal_message({
                 "type": "REPOSITORIES_LIST",
                 "payload": {"repositories": repos}
             }, client_id)
             
             # If this was the selected repository, select another one if available
-            if self.selected_repositories.get(client_id) == repository_id:
+            if self._get_selected_repository(client_id) == repository_id:
                 if repos:
                     # Select the first repository
-                    self.selected_repositories[client_id] = repos[0]["id"]
+                    self._set_selected_repository(client_id, repos[0]["id"])
                     await self.handle_fetch_files(client_id, {"repository_id": repos[0]["id"]})
                 else:
                     # No repositories left, clear selection
-                    self.selected_repositories.pop(client_id, None)
+                    self._set_selected_repository(client_id, None)
                     # Send empty file tree
                     await self.send_personal_message({
                         "type": "FILE_TREE_DATA",
@@ -392,7 +731,7 @@ class ConnectionManager:
                     }, client_id)
             
         except Exception as e:
-            logger.error(f"Error in handle_delete_repository: {e}")
+            logger.error("Error in handle_delete_repository: %s", e)
             await self.send_personal_message({
                 "type": "REPOSITORY_ACTION_ERROR",
                 "payload": {"message": str(e)}
@@ -411,7 +750,7 @@ class ConnectionManager:
                 return
             
             # Check if repository exists
-            repository = await db.get_repository(client_id, repository_id)
+            repository = await self._get_repository_cached(client_id, repository_id)
             
             if not repository:
                 await self.send_personal_message({
@@ -421,7 +760,7 @@ class ConnectionManager:
                 return
             
             # Update selected repository
-            self.selected_repositories[client_id] = repository_id
+            self._set_selected_repository(client_id, repository_id)
             
             # Send success response
             await self.send_personal_message({
@@ -430,10 +769,10 @@ class ConnectionManager:
             }, client_id)
             
             # Fetch file tree for the selected repository
-            await self.handle_fetch_files(client_id, {"repository_id": repository_id})
+            await self.handle_fetch_files(client_id, {"repository_id": repository_id}, repository=repository)
             
         except Exception as e:
-            logger.error(f"Error in handle_select_repository: {e}")
+            logger.error("Error in handle_select_repository: %s", e)
             await self.send_personal_message({
                 "type": "REPOSITORY_ACTION_ERROR",
                 "payload": {"message": str(e)}
@@ -462,7 +801,7 @@ class ConnectionManager:
             }, client_id)
         
         except Exception as e:
-            logger.error(f"Error in handle_get_issues: {e}")
+            logger.error("Error in handle_get_issues: %s", e)
             await self.send_personal_message({
                 "type": "GITHUB_ACTION_ERROR",
                 "payload": {"message": str(e)}
@@ -490,7 +829,7 @@ class ConnectionManager:
             }, client_id)
         
         except Exception as e:
-            logger.error(f"Error in handle_get_assigned_issues: {e}")
+            logger.error("Error in handle_get_assigned_issues: %s", e)
             await self.send_personal_message({
                 "type": "GITHUB_ACTION_ERROR",
                 "payload": {"message": str(e)}
@@ -528,7 +867,7 @@ class ConnectionManager:
             }, client_id)
         
         except Exception as e:
-            logger.error(f"Error in handle_create_issue: {e}")
+            logger.error("Error in handle_create_issue: %s", e)
             await self.send_personal_message({
                 "type": "GITHUB_ACTION_ERROR",
                 "payload": {"message": str(e)}
@@ -556,7 +895,7 @@ class ConnectionManager:
             }, client_id)
         
         except Exception as e:
-            logger.error(f"Error in handle_get_branches: {e}")
+            logger.error("Error in handle_get_branches: %s", e)
             await self.send_personal_message({
                 "type": "GITHUB_ACTION_ERROR",
                 "payload": {"message": str(e)}
@@ -599,7 +938,7 @@ class ConnectionManager:
             }, client_id)
         
         except Exception as e:
-            logger.error(f"Error in handle_create_branch: {e}")
+            logger.error("Error in handle_create_branch: %s", e)
             await self.send_personal_message({
                 "type": "GITHUB_ACTION_ERROR",
                 "payload": {"message": str(e)}
@@ -637,7 +976,7 @@ class ConnectionManager:
             }, client_id)
         
         except Exception as e:
-            logger.error(f"Error in handle_push_file: {e}")
+            logger.error("Error in handle_push_file: %s", e)
             await self.send_personal_message({
                 "type": "GITHUB_ACTION_ERROR",
                 "payload": {"message": str(e)}
@@ -682,7 +1021,7 @@ class ConnectionManager:
             }, client_id)
         
         except Exception as e:
-            logger.error(f"Error in handle_push_files: {e}")
+            logger.error("Error in handle_push_files: %s", e)
             await self.send_personal_message({
                 "type": "GITHUB_ACTION_ERROR",
                 "payload": {"message": str(e)}
@@ -720,7 +1059,7 @@ class ConnectionManager:
             }, client_id)
         
         except Exception as e:
-            logger.error(f"Error in handle_create_pull_request: {e}")
+            logger.error("Error in handle_create_pull_request: %s", e)
             await self.send_personal_message({
                 "type": "GITHUB_ACTION_ERROR",
                 "payload": {"message": str(e)}
@@ -749,7 +1088,7 @@ class ConnectionManager:
             }, client_id)
         
         except Exception as e:
-            logger.error(f"Error in handle_get_pull_requests: {e}")
+            logger.error("Error in handle_get_pull_requests: %s", e)
             await self.send_personal_message({
                 "type": "GITHUB_ACTION_ERROR",
                 "payload": {"message": str(e)}
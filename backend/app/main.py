@@ -8,7 +8,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
 from .api import router
+from .core.http_client import http_client
 from .core.mongodb import mongodb
+from .core.ws_manager import manager
 
 # Load environment variables from .env file
 load_dotenv()
@@ -52,11 +54,14 @@ async def startup():
     logger.info("Connecting to MongoDB...")
     await mongodb.connect()
     logger.info("MongoDB connection established")
+    await manager.start()
 
 
 @app.on_event("shutdown")
 async def shutdown():
     """Execute code on application shutdown"""
+    await manager.stop()
+    await http_client.close()
     logger.info("Closing MongoDB connection...")
     await mongodb.close()
     logger.info("MongoDB connection closed")
@@ -1,82 +1,203 @@
 """
 GitHub repository models with MongoDB integration
 """
-from typing import List, Dict, Any, Optional, Union
-import uuid
+from typing import List, Dict, Any, Iterable, Optional, Tuple, Union
+from collections import OrderedDict
+import asyncio
+import hashlib
+import threading
+import time
+from functools import lru_cache
+import secrets
 import base64
-from datetime import datetime
 import logging
+from urllib.parse import quote
+import httpx
+import orjson
 from github import Github, GithubException, InputGitTreeElement
+from pymongo import UpdateOne
+from ..core.http_client import http_client
 from ..core.mongodb import mongodb
-from ..schemas.ws_schemas import Repository, RepositoryResponse, FileNode, FileNodeType, GitHubIssue
+from ..schemas.ws_schemas import Repository, RepositoryResponse, RawDirectoryNode, RawFileLeaf, RawFileTreeNode, GitHubIssue
 
 logger = logging.getLogger(__name__)
 
+# Projections applied server-side so _id (and the token, for client-facing reads) never leave MongoDB
+PUBLIC_PROJECTION = {"_id": 0, "token": 0}
+INTERNAL_PROJECTION = {"_id": 0}
+
+# Seconds a fetched repository handle is reused before asking GitHub again
+REPO_HANDLE_TTL = 300.0
+
+# Least recently used repository handles are evicted past this size
+REPO_HANDLE_CACHE_SIZE = 1024
+
+# Repository handles by (host, token digest, "owner/repo"), with the time they were fetched
+_repo_cache: "OrderedDict[Tuple[str, bytes, str], Tuple[float, Any]]" = OrderedDict()
+
+# Handles are looked up from worker threads
+_repo_cache_lock = threading.Lock()
+
+# Most recently fetched file trees kept for conditional requests
+TREE_CACHE_SIZE = 64
+
+# File trees by (host, "owner/repo", branch), with the ETag of the trees response they were built from
+_tree_cache: "OrderedDict[Tuple[str, str, str], Tuple[str, List[RawFileTreeNode]]]" = OrderedDict()
+
+
+def _api_url(host: str) -> str:
+    """REST API base URL for github.com or a GitHub Enterprise host"""
+    if host == "github.com":
+        return "https://api.github.com"
+    return f"https://{host}/api/v3"
+
+
+class _ErrorSummary:
+    """Formats an error for logging only if the record is emitted
+    
+    GithubException's str() dumps the whole response body; this keeps
+    just the status and GitHub's message.
+    """
+    __slots__ = ("error",)
+    
+    def __init__(self, error: Exception):
+        self.error = error
+    
+    def __str__(self) -> str:
+        error = self.error
+        if isinstance(error, GithubException):
+            message = error.data.get("message") if isinstance(error.data, dict) else error.data
+            return f"{error.status} {message}"
+        if isinstance(error, httpx.HTTPStatusError):
+            return f"{error.response.status_code} {error.request.url.path}"
+        return str(error)
+
+
+@lru_cache(maxsize=128)
+def _get_gh_client(host: str, token: str) -> Github:
+    """Get a shared GitHub client, so its HTTP session and connections are reused"""
+    if host == "github.com":
+        return Github(token)
+    # For GitHub Enterprise
+    return Github(base_url=_api_url(host), login_or_token=token)
+
+
+def _get_repo_handle(host: str, token: str, full_repo_name: str) -> Any:
+    """Get a PyGithub Repository, reusing one fetched within REPO_HANDLE_TTL (blocking)"""
+    # Keyed by a digest so the cache does not hold tokens
+    key = (host, hashlib.blake2b(token.encode(), digest_size=16).digest(), full_repo_name)
+    now = time.monotonic()
+    with _repo_cache_lock:
+        entry = _repo_cache.get(key)
+        if entry is not None and now - entry[0] < REPO_HANDLE_TTL:
+            _repo_cache.move_to_end(key)
+            return entry[1]
+    
+    repo = _get_gh_client(host, token).get_repo(full_repo_name)
+    with _repo_cache_lock:
+        _repo_cache[key] = (now, repo)
+        _repo_cache.move_to_end(key)
+        while len(_repo_cache) > REPO_HANDLE_CACHE_SIZE:
+            _repo_cache.popitem(last=False)
+    return repo
+
 
 class GitHubModel:
     """GitHub repository model with MongoDB integration"""
     
+    @staticmethod
+    def _build_repository(client_id: str, repo_data: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Build the public view of a repository and the document stored in MongoDB
+        
+        The public view has RepositoryResponse's fields plus client_id. It is built from
+        data already validated on ingest and sent as a plain dict, so outbound
+        listings never run RepositoryResponse validators.
+        """
+        public = {
+            "id": repo_data.get("id") or secrets.token_hex(16),
+            "name": repo_data["name"],
+            "url": repo_data["url"],
+            "host": repo_data.get("host", "github.com"),  # Default to github.com
+            "owner": repo_data["owner"],
+            "repo": repo_data["repo"],
+            "branch": repo_data.get("branch", "main"),
+            "client_id": client_id,
+            "created_at": time.time_ns() // 1_000_000
+        }
+        return public, {**public, "token": repo_data["token"]}
+    
     async def add_repository(self, client_id: str, repo_data: Dict[str, Any]) -> Dict[str, Any]:
         """Add or update a repository for a client"""
         try:
-            logger.info(f"Adding repository for client {client_id}: {repo_data.get('name')}")
-            repo = {
-                "id": repo_data.get("id", str(uuid.uuid4())),
-                "name": repo_data["name"],
-                "url": repo_data["url"],
-                "host": repo_data.get("host", "github.com"),  # Default to github.com
-                "owner": repo_data["owner"],
-                "repo": repo_data["repo"],
-                "branch": repo_data.get("branch", "main"),
-                "token": repo_data["token"],
-                "client_id": client_id,
-                "created_at": int(datetime.now().timestamp() * 1000)
-            }
+            public, doc = self._build_repository(client_id, repo_data)
             
             # Use upsert to add or update
-            logger.info(f"Upserting repository {repo['name']} for client {client_id}")
-            result = await mongodb.db.repositories.update_one(
-                {"client_id": client_id, "name": repo["name"]},
-                {"$set": repo},
+            await mongodb.db.repositories.update_one(
+                {"client_id": client_id, "name": doc["name"]},
+                {"$set": doc},
                 upsert=True
             )
-            logger.info(f"Repository upsert result: matched={result.matched_count}, modified={result.modified_count}, upserted={result.upserted_id is not None}")
+            logger.debug("Upserted repository %s for client %s", doc['name'], client_id)
             
-            # Remove token before returning
-            repo_response = repo.copy()
-            repo_response.pop("token", None)
-            repo_response.pop("_id", None)
-            return repo_response
+            # The public view never carried the token
+            return public
             
         except Exception as e:
-            logger.error(f"Error adding repository: {e}")
+            logger.error("Error adding repository: %s", e)
+            raise
+    
+    async def add_repositories(self, client_id: str, repos_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Add or update several repositories for a client in one bulk write"""
+        try:
+            public_repos = []
+            operations = []
+            for repo_data in repos_data:
+                public, doc = self._build_repository(client_id, repo_data)
+                public_repos.append(public)
+                operations.append(UpdateOne(
+                    {"client_id": client_id, "name": doc["name"]},
+                    {"$set": doc},
+                    upsert=True
+                ))
+            
+            if operations:
+                # Unordered so independent upserts are not serialized server-side
+                await mongodb.db.repositories.bulk_write(operations, ordered=False)
+            
+            return public_repos
+            
+        except Exception as e:
+            logger.error("Error adding repositories: %s", e)
             raise
     
     async def get_repositories(self, client_id: str) -> List[Dict[str, Any]]:
         """Get all repositories for a client"""
         try:
-            cursor = mongodb.db.repositories.find({"client_id": client_id})
-            repos = []
-            async for repo in cursor:
-                # Don't include tokens or _id in response
-                repo.pop("_id", None)
-                repo.pop("token", None)
-                repos.append(repo)
-            return repos
+            # Don't include tokens or _id in response
+            cursor = mongodb.db.repositories.find({"client_id": client_id}, PUBLIC_PROJECTION)
+            return await cursor.to_list(length=None)
         except Exception as e:
-            logger.error(f"Error getting repositories: {e}")
+            logger.error("Error getting repositories: %s", e)
             return []
     
     async def get_repository(self, client_id: str, repo_id: str) -> Optional[Dict[str, Any]]:
-        """Get a repository by ID"""
+        """Get a repository by ID (without its token)"""
+        try:
+            return await mongodb.db.repositories.find_one(
+                {"client_id": client_id, "id": repo_id}, PUBLIC_PROJECTION
+            )
+        except Exception as e:
+            logger.error("Error getting repository: %s", e)
+        return None
+    
+    async def get_repository_internal(self, client_id: str, repo_id: str) -> Optional[Dict[str, Any]]:
+        """Get a repository by ID including its token, for server-side GitHub access"""
         try:
-            repo = await mongodb.db.repositories.find_one({"client_id": client_id, "id": repo_id})
-            if repo:
-                # Don't include _id in response
-                repo.pop("_id", None)
-                return repo
+            return await mongodb.db.repositories.find_one(
+                {"client_id": client_id, "id": repo_id}, INTERNAL_PROJECTION
+            )
         except Exception as e:
-            logger.error(f"Error getting repository: {e}")
+            logger.error("Error getting repository: %s", e)
         return None
     
     async def delete_repository(self, client_id: str, repo_id: str) -> bool:
@@ -85,7 +206,7 @@ class GitHubModel:
             result = await mongodb.db.repositories.delete_one({"client_id": client_id, "id": repo_id})
             return result.deleted_count > 0
         except Exception as e:
-            logger.error(f"Error deleting repository: {e}")
+            logger.error("Error deleting repository: %s", e)
             return False
     
     async def validate_repository(self, repo_data: Dict[str, Any]) -> bool:
@@ -102,24 +223,22 @@ class GitHubModel:
             # Build full repo name
             full_repo_name = f"{owner}/{repo_name}"
             
-            # Create GitHub instance with token and optional enterprise URL
-            if host == "github.com":
-                g = Github(token)
-            else:
-                # For GitHub Enterprise
-                api_url = f"https://{host}/api/v3"
-                g = Github(base_url=api_url, login_or_token=token)
-            
-            # Try to get the repository
-            repo = g.get_repo(full_repo_name)
-            # If we get here without an exception, repository exists
-            return True
+            # A HEAD request answers whether the token can see the repository without the metadata body
+            response = await http_client.client.head(
+                f"{_api_url(host)}/repos/{full_repo_name}",
+                headers={"Authorization": f"Bearer {token}", "Accept": "application/vnd.github+json"},
+            )
+            if response.status_code == 404:
+                logger.debug("Repository %s not found or not visible to the token", full_repo_name)
+            elif response.status_code != 200:
+                logger.warning("GitHub returned %s validating repository %s", response.status_code, full_repo_name)
+            return response.status_code == 200
             
         except Exception as e:
-            logger.error(f"Error validating repository: {e}")
+            logger.error("Error validating repository: %s", _ErrorSummary(e))
             return False
     
-    async def fetch_file_tree(self, repository_data: Dict[str, Any]) -> List[FileNode]:
+    async def fetch_file_tree(self, repository_data: Dict[str, Any]) -> List[RawFileTreeNode]:
         """
         Fetch file tree from GitHub repository
         
@@ -140,78 +259,108 @@ class GitHubModel:
             # Build full repo name
             full_repo_name = f"{owner}/{repo_name}"
             
-            # Create GitHub instance with token and optional enterprise URL
-            if host == "github.com":
-                g = Github(token)
+            # Fetch the whole tree for the branch in a single request on the shared client
+            cache_key = (host, full_repo_name, branch)
+            cached = _tree_cache.get(cache_key)
+            headers = {"Authorization": f"Bearer {token}", "Accept": "application/vnd.github+json"}
+            if cached is not None:
+                # GitHub answers 304 with no body while the branch still points at the same tree
+                headers["If-None-Match"] = cached[0]
+            response = await http_client.client.get(
+                f"{_api_url(host)}/repos/{full_repo_name}/git/trees/{quote(branch, safe='')}",
+                params={"recursive": "1"},
+                headers=headers,
+            )
+            if response.status_code == 304 and cached is not None:
+                logger.debug("Git tree for %s@%s is unchanged", full_repo_name, branch)
+                _tree_cache.move_to_end(cache_key)
+                return cached[1]
+            response.raise_for_status()
+            tree = orjson.loads(response.content)
+            
+            if tree.get("truncated"):
+                # Too large for one response; walk the directories instead
+                logger.info("Git tree for %s is truncated, listing directories individually", full_repo_name)
+                repo = await asyncio.to_thread(_get_repo_handle, host, token, full_repo_name)
+                file_nodes = await self._get_directory_contents(repo, "", branch)
             else:
-                # For GitHub Enterprise
-                api_url = f"https://{host}/api/v3"
-                g = Github(base_url=api_url, login_or_token=token)
-            
-            # Get the repository
-            repo = g.get_repo(full_repo_name)
+                file_nodes = self._build_file_tree((entry["path"], entry["type"]) for entry in tree["tree"])
             
-            # Get the top-level contents for the specified branch
-            contents = repo.get_contents("", ref=branch)
-            
-            # Convert contents to FileNode objects
-            file_nodes: List[FileNode] = []
-            
-            for content in contents:
-                if content.type == "dir":
-                    # It's a directory, recursively get its contents
-                    file_nodes.append(
-                        FileNode(
-                            id=content.path,
-                            name=content.name,
-                            type=FileNodeType.DIRECTORY,
-                            path=content.path,
-                            children=self._get_directory_contents(repo, content.path, branch)
-                        )
-                    )
-                else:
-                    # It's a file
-                    file_nodes.append(
-                        FileNode(
-                            id=content.path,
-                            name=content.name,
-                            type=FileNodeType.FILE,
-                            path=content.path
-                        )
-                    )
+            # Remember the tree against its ETag, evicting the least recently used one
+            etag = response.headers.get("ETag")
+            if etag:
+                _tree_cache[cache_key] = (etag, file_nodes)
+                _tree_cache.move_to_end(cache_key)
+                if len(_tree_cache) > TREE_CACHE_SIZE:
+                    _tree_cache.popitem(last=False)
             
             # Return file nodes with repository info
             return file_nodes
         
-        except GithubException as e:
-            logger.error(f"GitHub error: {e}")
+        except (GithubException, httpx.HTTPStatusError) as e:
+            logger.error("GitHub error: %s", _ErrorSummary(e))
             raise e
         except Exception as e:
-            logger.error(f"Error fetching GitHub file tree: {e}")
+            logger.error("Error fetching GitHub file tree: %s", _ErrorSummary(e))
             raise e
     
-    def _get_directory_contents(self, repo: Any, path: str, branch: str) -> List[FileNode]:
-        """Recursively get directory contents"""
-        contents = repo.get_contents(path, ref=branch)
-        file_nodes: List[FileNode] = []
+    @staticmethod
+    def _build_file_tree(entries: Iterable[Tuple[str, str]]) -> List[RawFileTreeNode]:
+        """Build nested raw tree nodes from flat (path, type) Git tree entries"""
+        # Nest path segments into dicts; directories map to dicts, files to None
+        root: Dict[str, Any] = {}
+        for path, entry_type in entries:
+            *parents, name = path.split("/")
+            node = root
+            for part in parents:
+                node = node.setdefault(part, {})
+            if entry_type == "tree":
+                node.setdefault(name, {})
+            else:
+                node[name] = None
+        
+        def to_nodes(entries: Dict[str, Any], prefix: str) -> List[RawFileTreeNode]:
+            nodes: List[RawFileTreeNode] = []
+            for name, children in entries.items():
+                path = prefix + name
+                if children is None:
+                    nodes.append(RawFileLeaf(id=path, name=name, path=path))
+                else:
+                    nodes.append(RawDirectoryNode(
+                        id=path,
+                        name=name,
+                        path=path,
+                        children=to_nodes(children, path + "/")
+                    ))
+            return nodes
+        
+        return to_nodes(root, "")
+    
+    async def _get_directory_contents(self, repo: Any, path: str, branch: str) -> List[RawFileTreeNode]:
+        """Recursively get directory contents, fetching sibling directories concurrently"""
+        contents = await asyncio.to_thread(repo.get_contents, path, ref=branch)
+        directories = [content for content in contents if content.type == "dir"]
+        children = await asyncio.gather(*(
+            self._get_directory_contents(repo, content.path, branch) for content in directories
+        ))
+        children_by_path = {content.path: nodes for content, nodes in zip(directories, children)}
+        file_nodes: List[RawFileTreeNode] = []
         
         for content in contents:
             if content.type == "dir":
                 file_nodes.append(
-                    FileNode(
+                    RawDirectoryNode(
                         id=content.path,
                         name=content.name,
-                        type=FileNodeType.DIRECTORY,
                         path=content.path,
-                        children=self._get_directory_contents(repo, content.path, branch)
+                        children=children_by_path[content.path]
                     )
                 )
             else:
                 file_nodes.append(
-                    FileNode(
+                    RawFileLeaf(
                         id=content.path,
                         name=content.name,
-                        type=FileNodeType.FILE,
                         path=content.path
                     )
                 )
@@ -222,13 +371,10 @@ class GitHubModel:
         """Get issues from a GitHub repository"""
         try:
             # Get repository details to access GitHub
-            repo_data = await self.get_repository(client_id, repo_id)
-            if not repo_data or "token" not in repo_data:
-                # Refetch with token if missing
-                repo_data = await mongodb.db.repositories.find_one({"client_id": client_id, "id": repo_id})
-                if not repo_data:
-                    logger.error(f"Repository not found for client {client_id}, repo_id {repo_id}")
-                    return []
+            repo_data = await self.get_repository_internal(client_id, repo_id)
+            if not repo_data:
+                logger.error("Repository not found for client %s, repo_id %s", client_id, repo_id)
+                return []
             
             # Setup GitHub client
             g = self._get_github_client(repo_data)
@@ -263,7 +409,7 @@ class GitHubModel:
             return issues
             
         except Exception as e:
-            logger.error(f"Error getting issues: {e}")
+            logger.error("Error getting issues: %s", _ErrorSummary(e))
             return []
     
     async def get_assigned_issues(self, client_id: str, username: str) -> List[Dict[str, Any]]:
@@ -274,7 +420,7 @@ class GitHubModel:
             all_issues = []
             
             for repo in repos:
-                repo_data = await mongodb.db.repositories.find_one({"client_id": client_id, "id": repo["id"]})
+                repo_data = await mongodb.db.repositories.find_one({"client_id": client_id, "id": repo["id"]}, INTERNAL_PROJECTION)
                 if not repo_data:
                     continue
                 
@@ -311,7 +457,7 @@ class GitHubModel:
             return all_issues
             
         except Exception as e:
-            logger.error(f"Error getting assigned issues: {e}")
+            logger.error("Error getting assigned issues: %s", _ErrorSummary(e))
             return []
     
     async def create_issue(self, client_id: str, repo_id: str, title: str, body: str, 
@@ -319,9 +465,9 @@ class GitHubModel:
         """Create a new issue in a GitHub repository"""
         try:
             # Get repository details
-            repo_data = await mongodb.db.repositories.find_one({"client_id": client_id, "id": repo_id})
+            repo_data = await mongodb.db.repositories.find_one({"client_id": client_id, "id": repo_id}, INTERNAL_PROJECTION)
             if not repo_data:
-                logger.error(f"Repository not found for client {client_id}, repo_id {repo_id}")
+                logger.error("Repository not found for client %s, repo_id %s", client_id, repo_id)
                 raise ValueError("Repository not found")
             
             # Setup GitHub client
@@ -360,7 +506,7 @@ class GitHubModel:
             return issue_data
             
         except Exception as e:
-            logger.error(f"Error creating issue: {e}")
+            logger.error("Error creating issue: %s", _ErrorSummary(e))
             raise
     
     async def _sync_issue(self, client_id: str, repo_id: str, issue_data: Dict[str, Any]) -> None:
@@ -376,15 +522,15 @@ class GitHubModel:
                 upsert=True
             )
         except Exception as e:
-            logger.error(f"Error syncing issue: {e}")
+            logger.error("Error syncing issue: %s", _ErrorSummary(e))
     
     async def create_branch(self, client_id: str, repo_id: str, branch_name: str, base_branch: Optional[str] = None) -> Dict[str, Any]:
         """Create a new branch in a repository"""
         try:
             # Get repository details
-            repo_data = await mongodb.db.repositories.find_one({"client_id": client_id, "id": repo_id})
+            repo_data = await mongodb.db.repositories.find_one({"client_id": client_id, "id": repo_id}, INTERNAL_PROJECTION)
             if not repo_data:
-                logger.error(f"Repository not found for client {client_id}, repo_id {repo_id}")
+                logger.error("Repository not found for client %s, repo_id %s", client_id, repo_id)
                 raise ValueError("Repository not found")
             
             # Setup GitHub client
@@ -417,16 +563,16 @@ class GitHubModel:
             return branch_data
         
         except Exception as e:
-            logger.error(f"Error creating branch: {e}")
+            logger.error("Error creating branch: %s", _ErrorSummary(e))
             raise
     
     async def get_branches(self, client_id: str, repo_id: str) -> List[Dict[str, Any]]:
         """Get branches for a repository"""
         try:
             # Get repository details
-            repo_data = await mongodb.db.repositories.find_one({"client_id": client_id, "id": repo_id})
+            repo_data = await mongodb.db.repositories.find_one({"client_id": client_id, "id": repo_id}, INTERNAL_PROJECTION)
             if not repo_data:
-                logger.error(f"Repository not found for client {client_id}, repo_id {repo_id}")
+                logger.error("Repository not found for client %s, repo_id %s", client_id, repo_id)
                 return []
             
             # Setup GitHub client
@@ -448,7 +594,7 @@ class GitHubModel:
             return branches
         
         except Exception as e:
-            logger.error(f"Error getting branches: {e}")
+            logger.error("Error getting branches: %s", _ErrorSummary(e))
             return []
     
     async def push_file(self, client_id: str, repo_id: str, file_path: str, content: str, 
@@ -456,9 +602,9 @@ class GitHubModel:
         """Push a file to a GitHub repository"""
         try:
             # Get repository details
-            repo_data = await mongodb.db.repositories.find_one({"client_id": client_id, "id": repo_id})
+            repo_data = await mongodb.db.repositories.find_one({"client_id": client_id, "id": repo_id}, INTERNAL_PROJECTION)
             if not repo_data:
-                logger.error(f"Repository not found for client {client_id}, repo_id {repo_id}")
+                logger.error("Repository not found for client %s, repo_id %s", client_id, repo_id)
                 raise ValueError("Repository not found")
             
             # Setup GitHub client
@@ -508,7 +654,7 @@ class GitHubModel:
             }
         
         except Exception as e:
-            logger.error(f"Error pushing file: {e}")
+            logger.error("Error pushing file: %s", _ErrorSummary(e))
             raise
     
     async def push_files(self, client_id: str, repo_id: str, files: List[Dict[str, str]], 
@@ -516,9 +662,9 @@ class GitHubModel:
         """Push multiple files to a GitHub repository in a single commit"""
         try:
             # Get repository details
-            repo_data = await mongodb.db.repositories.find_one({"client_id": client_id, "id": repo_id})
+            repo_data = await mongodb.db.repositories.find_one({"client_id": client_id, "id": repo_id}, INTERNAL_PROJECTION)
             if not repo_data:
-                logger.error(f"Repository not found for client {client_id}, repo_id {repo_id}")
+                logger.error("Repository not found for client %s, repo_id %s", client_id, repo_id)
                 raise ValueError("Repository not found")
             
             # Setup GitHub client
@@ -581,7 +727,7 @@ class GitHubModel:
             }
         
         except Exception as e:
-            logger.error(f"Error pushing files: {e}")
+            logger.error("Error pushing files: %s", _ErrorSummary(e))
             raise
     
     async def create_pull_request(self, client_id: str, repo_id: str, title: str, body: str, 
@@ -589,9 +735,9 @@ class GitHubModel:
         """Create a pull request"""
         try:
             # Get repository details
-            repo_data = await mongodb.db.repositories.find_one({"client_id": client_id, "id": repo_id})
+            repo_data = await mongodb.db.repositories.find_one({"client_id": client_id, "id": repo_id}, INTERNAL_PROJECTION)
             if not repo_data:
-                logger.error(f"Repository not found for client {client_id}, repo_id {repo_id}")
+                logger.error("Repository not found for client %s, repo_id %s", client_id, repo_id)
                 raise ValueError("Repository not found")
             
             # Setup GitHub client
@@ -634,16 +780,16 @@ class GitHubModel:
             return pr_data
         
         except Exception as e:
-            logger.error(f"Error creating pull request: {e}")
+            logger.error("Error creating pull request: %s", _ErrorSummary(e))
             raise
     
     async def get_pull_requests(self, client_id: str, repo_id: str, state: str = "open") -> List[Dict[str, Any]]:
         """Get pull requests from a GitHub repository"""
         try:
             # Get repository details
-            repo_data = await mongodb.db.repositories.find_one({"client_id": client_id, "id": repo_id})
+            repo_data = await mongodb.db.repositories.find_one({"client_id": client_id, "id": repo_id}, INTERNAL_PROJECTION)
             if not repo_data:
-                logger.error(f"Repository not found for client {client_id}, repo_id {repo_id}")
+                logger.error("Repository not found for client %s, repo_id %s", client_id, repo_id)
                 return []
             
             # Setup GitHub client
@@ -681,7 +827,7 @@ class GitHubModel:
             return pull_requests
         
         except Exception as e:
-            logger.error(f"Error getting pull requests: {e}")
+            logger.error("Error getting pull requests: %s", _ErrorSummary(e))
             return []
     
     async def get_file_content(self, client_id: str, repo_id: str, file_path: str, branch: Optional[str] = None) -> Dict[str, Any]:
@@ -699,9 +845,9 @@ class GitHubModel:
         """
         try:
             # Get repository details
-            repo_data = await mongodb.db.repositories.find_one({"client_id": client_id, "id": repo_id})
+            repo_data = await mongodb.db.repositories.find_one({"client_id": client_id, "id": repo_id}, INTERNAL_PROJECTION)
             if not repo_data:
-                logger.error(f"Repository not found for client {client_id}, repo_id {repo_id}")
+                logger.error("Repository not found for client %s, repo_id %s", client_id, repo_id)
                 raise ValueError("Repository not found")
             
             # Setup GitHub client
@@ -742,25 +888,17 @@ class GitHubModel:
             }
         
         except GithubException as e:
-            logger.error(f"GitHub error getting file content: {e}")
+            logger.error("GitHub error getting file content: %s", _ErrorSummary(e))
             if e.status == 404:
                 raise ValueError(f"File {file_path} not found in repository")
             raise
         except Exception as e:
-            logger.error(f"Error getting file content: {e}")
+            logger.error("Error getting file content: %s", _ErrorSummary(e))
             raise
     
     def _get_github_client(self, repo_data: Dict[str, Any]) -> Github:
         """Helper method to get a GitHub client"""
-        host = repo_data.get("host", "github.com")
-        token = repo_data.get("token")
-        
-        if host == "github.com":
-            return Github(token)
-        else:
-            # For GitHub Enterprise
-            api_url = f"https://{host}/api/v3"
-            return Github(base_url=api_url, login_or_token=token)
+        return _get_gh_client(repo_data.get("host", "github.com"), repo_data.get("token"))
 
 
 # Create a singleton instance
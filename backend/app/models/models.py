@@ -2,13 +2,16 @@
 Database models with MongoDB integration
 """
 from typing import List, Dict, Any, Optional
-import uuid
-from datetime import datetime
+import time
+import secrets
 import logging
 from ..core.mongodb import mongodb
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of chat messages returned by get_messages
+MESSAGE_HISTORY_LIMIT = 500
+
 class MongoDB:
     """MongoDB database interface"""
     
@@ -21,7 +24,7 @@ class MongoDB:
                 upsert=True
             )
         except Exception as e:
-            logger.error(f"Error adding connection: {e}")
+            logger.error("Error adding connection: %s", e)
 
     async def remove_connection(self, client_id: str) -> None:
         """Mark a WebSocket connection as inactive"""
@@ -31,7 +34,17 @@ class MongoDB:
                 {"$set": {"active": False}}
             )
         except Exception as e:
-            logger.error(f"Error removing connection: {e}")
+            logger.error("Error removing connection: %s", e)
+
+    async def remove_connections(self, client_ids: List[str]) -> None:
+        """Mark several WebSocket connections as inactive in one update"""
+        try:
+            await mongodb.db.connections.update_many(
+                {"client_id": {"$in": client_ids}},
+                {"$set": {"active": False}}
+            )
+        except Exception as e:
+            logger.error("Error removing connections: %s", e)
 
     async def update_connection_config(self, client_id: str, config: Dict[str, Any]) -> None:
         """Update configuration for a connection"""
@@ -41,7 +54,7 @@ class MongoDB:
                 {"$set": {"config": config}}
             )
         except Exception as e:
-            logger.error(f"Error updating connection config: {e}")
+            logger.error("Error updating connection config: %s", e)
     
     async def get_connection_config(self, client_id: str) -> Optional[Dict[str, Any]]:
         """Get configuration for a connection"""
@@ -50,45 +63,48 @@ class MongoDB:
             if connection and "config" in connection:
                 return connection["config"]
         except Exception as e:
-            logger.error(f"Error getting connection config: {e}")
+            logger.error("Error getting connection config: %s", e)
         return None
 
     async def add_message(self, client_id: str, sender: str, text: str) -> Dict[str, Any]:
         """Add a new message"""
         try:
             message = {
-                "id": str(uuid.uuid4()),
+                "id": secrets.token_hex(16),
                 "sender": sender,
                 "text": text, 
-                "timestamp": int(datetime.now().timestamp() * 1000),
+                "timestamp": time.time_ns() // 1_000_000,
                 "client_id": client_id
             }
             await mongodb.db.messages.insert_one(message)
             # Remove _id field from message (ObjectId is not JSON serializable)
             return {k: v for k, v in message.items() if k != '_id'}
         except Exception as e:
-            logger.error(f"Error adding message: {e}")
+            logger.error("Error adding message: %s", e)
             # Fallback to returning message without DB insertion
             return {
-                "id": str(uuid.uuid4()),
+                "id": secrets.token_hex(16),
                 "sender": sender,
                 "text": text, 
-                "timestamp": int(datetime.now().timestamp() * 1000),
+                "timestamp": time.time_ns() // 1_000_000,
                 "client_id": client_id
             }
     
-    async def get_messages(self, client_id: str) -> List[Dict[str, Any]]:
-        """Get all messages for a client"""
+    async def get_messages(self, client_id: str, limit: int = MESSAGE_HISTORY_LIMIT) -> List[Dict[str, Any]]:
+        """Get the most recent messages for a client, oldest first"""
         try:
-            cursor = mongodb.db.messages.find({"client_id": client_id}).sort("timestamp", 1)
-            messages = []
-            async for message in cursor:
-                # Remove _id field (ObjectId is not JSON serializable)
-                message.pop("_id", None)
-                messages.append(message)
+            # Exclude _id server-side (ObjectId is not JSON serializable) and
+            # let MongoDB pick the newest `limit` messages
+            cursor = (
+                mongodb.db.messages.find({"client_id": client_id}, {"_id": 0})
+                .sort("timestamp", -1)
+                .limit(limit)
+            )
+            messages = await cursor.to_list(length=limit)
+            messages.reverse()
             return messages
         except Exception as e:
-            logger.error(f"Error getting messages: {e}")
+            logger.error("Error getting messages: %s", e)
             return []
 
 # Create a single database instance
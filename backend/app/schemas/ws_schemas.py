@@ -1,10 +1,13 @@
 """
 Pydantic schemas for the application
 """
+from dataclasses import dataclass
 from enum import Enum
-import uuid
-from typing import List, Optional, Union, Dict, Any
-from pydantic import BaseModel, Field, HttpUrl
+from functools import lru_cache
+import secrets
+from typing import Annotated, List, Literal, Optional, Union, Dict, Any
+import orjson
+from pydantic import BaseModel, ConfigDict, Field, HttpUrl, TypeAdapter
 
 
 class MessageSender(str, Enum):
@@ -26,18 +29,56 @@ class FileNodeType(str, Enum):
     DIRECTORY = "directory"
 
 
-class FileNode(BaseModel):
-    """Schema for file tree nodes"""
+class FileLeaf(BaseModel):
+    """Schema for a file in the file tree"""
+    type: Literal["file"]
     id: str
     name: str
-    type: FileNodeType
     path: str
-    children: Optional[List['FileNode']] = None
+
+
+class DirectoryNode(BaseModel):
+    """Schema for a directory in the file tree"""
+    type: Literal["directory"]
+    id: str
+    name: str
+    path: str
+    children: list['FileTreeNode']
+
+
+# A file tree node, dispatched on "type"; only directories carry children
+FileTreeNode = Annotated[Union[FileLeaf, DirectoryNode], Field(discriminator="type")]
+
+
+@dataclass(slots=True)
+class RawFileLeaf:
+    """Server-built file, same shape as FileLeaf without validation
+    
+    Trees can hold tens of thousands of nodes; these are serialized
+    directly with orjson.
+    """
+    id: str
+    name: str
+    path: str
+    type: FileNodeType = FileNodeType.FILE
+
+
+@dataclass(slots=True)
+class RawDirectoryNode:
+    """Server-built directory, same shape as DirectoryNode without validation"""
+    id: str
+    name: str
+    path: str
+    children: List["RawFileTreeNode"]
+    type: FileNodeType = FileNodeType.DIRECTORY
+
+
+RawFileTreeNode = Union[RawFileLeaf, RawDirectoryNode]
 
 
 class Repository(BaseModel):
     """Schema for a GitHub repository"""
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: secrets.token_hex(16))
     name: str
     url: str
     host: str = "github.com"  # Default to github.com, can be a GH Enterprise domain
@@ -126,7 +167,7 @@ class FileCommit(BaseModel):
 # Client -> Server Message Types
 class ConfigData(BaseModel):
     """Configuration data from client"""
-    geminiToken: str
+    geminiToken: str = ""
     repositories: List[Repository] = []
 
 
@@ -137,7 +178,7 @@ class FetchFilesPayload(BaseModel):
 
 class SendChatMessagePayload(BaseModel):
     """Payload for sending chat messages"""
-    text: str
+    text: str = ""
 
 
 class AddRepositoryPayload(BaseModel):
@@ -161,72 +202,6 @@ class SelectRepositoryPayload(BaseModel):
     repository_id: str
 
 
-# Client -> Server Message Union Type
-class ClientMessage(BaseModel):
-    """Base model for client messages"""
-    type: str
-    payload: Union[ConfigData, FetchFilesPayload, SendChatMessagePayload, 
-                  AddRepositoryPayload, UpdateRepositoryPayload, 
-                  DeleteRepositoryPayload, SelectRepositoryPayload,
-                  GetIssuesPayload, GetAssignedIssuesPayload, CreateIssuePayload,
-                  GetBranchesPayload, CreateBranchPayload, PushFilePayload, PushFilesPayload,
-                  CreatePullRequestPayload, GetPullRequestsPayload, Dict[str, Any]]
-
-
-# Server -> Client Message Types
-class ConfigSuccessMessage(BaseModel):
-    """Success message for configuration"""
-    type: str = "CONFIG_SUCCESS"
-
-
-class ConfigErrorMessage(BaseModel):
-    """Error message for configuration"""
-    type: str = "CONFIG_ERROR"
-    payload: Dict[str, str]
-
-
-class FileTreeDataMessage(BaseModel):
-    """File tree data message"""
-    type: str = "FILE_TREE_DATA"
-    payload: Dict[str, Any]
-
-
-class FileTreeErrorMessage(BaseModel):
-    """File tree error message"""
-    type: str = "FILE_TREE_ERROR"
-    payload: Dict[str, str]
-
-
-class RepositoriesListMessage(BaseModel):
-    """Repositories list message"""
-    type: str = "REPOSITORIES_LIST"
-    payload: Dict[str, List[RepositoryResponse]]
-
-
-class RepositoryActionSuccessMessage(BaseModel):
-    """Repository action success message"""
-    type: str = "REPOSITORY_ACTION_SUCCESS"
-    payload: Dict[str, Any]
-
-
-class RepositoryActionErrorMessage(BaseModel):
-    """Repository action error message"""
-    type: str = "REPOSITORY_ACTION_ERROR"
-    payload: Dict[str, str]
-
-
-class NewChatMessage(BaseModel):
-    """New chat message"""
-    type: str = "NEW_CHAT_MESSAGE"
-    payload: ChatMessage
-
-
-class AgentTypingMessage(BaseModel):
-    """Agent typing status message"""
-    type: str = "AGENT_TYPING"
-    payload: Dict[str, bool]
-
-
 class GetIssuesPayload(BaseModel):
     """Payload for fetching issues from GitHub"""
     repository_id: str
@@ -242,7 +217,7 @@ class CreateIssuePayload(BaseModel):
     """Payload for creating a GitHub issue"""
     repository_id: str
     title: str
-    body: str
+    body: Optional[str] = None
     assignees: Optional[List[str]] = None
     labels: Optional[List[str]] = None
 
@@ -280,7 +255,7 @@ class CreatePullRequestPayload(BaseModel):
     """Payload for creating a GitHub pull request"""
     repository_id: str
     title: str
-    body: str
+    body: Optional[str] = None
     head_branch: str
     base_branch: str
 
@@ -291,49 +266,240 @@ class GetPullRequestsPayload(BaseModel):
     state: Optional[str] = "open"
 
 
-class GithubIssuesListMessage(BaseModel):
+# Client -> Server Message Envelopes, one per message type
+class SubmitConfigMessage(BaseModel):
+    """Submit configuration"""
+    type: Literal["SUBMIT_CONFIG"]
+    payload: ConfigData
+
+
+class FetchFilesMessage(BaseModel):
+    """Fetch a repository's file tree"""
+    type: Literal["FETCH_FILES"]
+    payload: FetchFilesPayload
+
+
+class SendChatMessageMessage(BaseModel):
+    """Send a chat message"""
+    type: Literal["SEND_CHAT_MESSAGE"]
+    payload: SendChatMessagePayload
+
+
+class AddRepositoryMessage(BaseModel):
+    """Add a repository"""
+    type: Literal["ADD_REPOSITORY"]
+    payload: AddRepositoryPayload
+
+
+class UpdateRepositoryMessage(BaseModel):
+    """Update a repository"""
+    type: Literal["UPDATE_REPOSITORY"]
+    payload: UpdateRepositoryPayload
+
+
+class DeleteRepositoryMessage(BaseModel):
+    """Delete a repository"""
+    type: Literal["DELETE_REPOSITORY"]
+    payload: DeleteRepositoryPayload
+
+
+class SelectRepositoryMessage(BaseModel):
+    """Select a repository"""
+    type: Literal["SELECT_REPOSITORY"]
+    payload: SelectRepositoryPayload
+
+
+class GetIssuesMessage(BaseModel):
+    """Fetch issues"""
+    type: Literal["GET_ISSUES"]
+    payload: GetIssuesPayload
+
+
+class GetAssignedIssuesMessage(BaseModel):
+    """Fetch issues assigned to a user"""
+    type: Literal["GET_ASSIGNED_ISSUES"]
+    payload: GetAssignedIssuesPayload
+
+
+class CreateIssueMessage(BaseModel):
+    """Create an issue"""
+    type: Literal["CREATE_ISSUE"]
+    payload: CreateIssuePayload
+
+
+class GetBranchesMessage(BaseModel):
+    """Fetch branches"""
+    type: Literal["GET_BRANCHES"]
+    payload: GetBranchesPayload
+
+
+class CreateBranchMessage(BaseModel):
+    """Create a branch"""
+    type: Literal["CREATE_BRANCH"]
+    payload: CreateBranchPayload
+
+
+class PushFileMessage(BaseModel):
+    """Push a single file"""
+    type: Literal["PUSH_FILE"]
+    payload: PushFilePayload
+
+
+class PushFilesMessage(BaseModel):
+    """Push several files in one commit"""
+    type: Literal["PUSH_FILES"]
+    payload: PushFilesPayload
+
+
+class CreatePullRequestMessage(BaseModel):
+    """Create a pull request"""
+    type: Literal["CREATE_PULL_REQUEST"]
+    payload: CreatePullRequestPayload
+
+
+class GetPullRequestsMessage(BaseModel):
+    """Fetch pull requests"""
+    type: Literal["GET_PULL_REQUESTS"]
+    payload: GetPullRequestsPayload
+
+
+class PingMessage(BaseModel):
+    """Keepalive ping"""
+    type: Literal["PING"]
+    payload: Dict[str, Any] = {}
+
+
+class PongMessage(BaseModel):
+    """Keepalive pong"""
+    type: Literal["PONG"]
+    payload: Dict[str, Any] = {}
+
+
+# Client -> Server Message Union Type, dispatched on "type" to exactly one envelope
+ClientMessage = Annotated[
+    Union[
+        SubmitConfigMessage, FetchFilesMessage, SendChatMessageMessage,
+        AddRepositoryMessage, UpdateRepositoryMessage, DeleteRepositoryMessage, SelectRepositoryMessage,
+        GetIssuesMessage, GetAssignedIssuesMessage, CreateIssueMessage,
+        GetBranchesMessage, CreateBranchMessage, PushFileMessage, PushFilesMessage,
+        CreatePullRequestMessage, GetPullRequestsMessage,
+        PingMessage, PongMessage,
+    ],
+    Field(discriminator="type"),
+]
+
+# Validates inbound frames (JSON bytes/str or decoded dicts); its validator is built once here
+CLIENT_MESSAGE_ADAPTER = TypeAdapter(ClientMessage)
+
+
+# Server -> Client Message Types
+class ServerMessage(BaseModel):
+    """Base for server messages; built immutable and with their schema compiled at import"""
+    model_config = ConfigDict(frozen=True, extra="forbid", defer_build=False)
+
+
+@lru_cache(maxsize=None)
+def json_envelope_prefix(message_cls: type) -> bytes:
+    """JSON for a server message up to its payload value, so only the payload has to be encoded"""
+    return orjson.dumps({"type": message_cls.model_fields["type"].default})[:-1] + b',"payload":'
+
+
+class ConfigSuccessMessage(ServerMessage):
+    """Success message for configuration"""
+    type: str = "CONFIG_SUCCESS"
+
+
+class ConfigErrorMessage(ServerMessage):
+    """Error message for configuration"""
+    type: str = "CONFIG_ERROR"
+    payload: Dict[str, str]
+
+
+class FileTreeDataMessage(ServerMessage):
+    """File tree data message"""
+    type: str = "FILE_TREE_DATA"
+    payload: Dict[str, Any]
+
+
+class FileTreeErrorMessage(ServerMessage):
+    """File tree error message"""
+    type: str = "FILE_TREE_ERROR"
+    payload: Dict[str, str]
+
+
+class RepositoriesListMessage(ServerMessage):
+    """Repositories list message"""
+    type: str = "REPOSITORIES_LIST"
+    payload: Dict[str, List[RepositoryResponse]]
+
+
+class RepositoryActionSuccessMessage(ServerMessage):
+    """Repository action success message"""
+    type: str = "REPOSITORY_ACTION_SUCCESS"
+    payload: Dict[str, Any]
+
+
+class RepositoryActionErrorMessage(ServerMessage):
+    """Repository action error message"""
+    type: str = "REPOSITORY_ACTION_ERROR"
+    payload: Dict[str, str]
+
+
+class NewChatMessage(ServerMessage):
+    """New chat message"""
+    type: str = "NEW_CHAT_MESSAGE"
+    payload: ChatMessage
+
+
+class AgentTypingMessage(ServerMessage):
+    """Agent typing status message"""
+    type: str = "AGENT_TYPING"
+    payload: Dict[str, bool]
+
+
+class GithubIssuesListMessage(ServerMessage):
     """GitHub issues list message"""
     type: str = "GITHUB_ISSUES_LIST"
     payload: Dict[str, List[Dict[str, Any]]]
 
 
-class GithubIssueActionSuccessMessage(BaseModel):
+class GithubIssueActionSuccessMessage(ServerMessage):
     """GitHub issue action success message"""
     type: str = "GITHUB_ISSUE_ACTION_SUCCESS"
     payload: Dict[str, Any]
 
 
-class GithubBranchesListMessage(BaseModel):
+class GithubBranchesListMessage(ServerMessage):
     """GitHub branches list message"""
     type: str = "GITHUB_BRANCHES_LIST"
     payload: Dict[str, List[Dict[str, Any]]]
 
 
-class GithubBranchActionSuccessMessage(BaseModel):
+class GithubBranchActionSuccessMessage(ServerMessage):
     """GitHub branch action success message"""
     type: str = "GITHUB_BRANCH_ACTION_SUCCESS"
     payload: Dict[str, Any]
 
 
-class GithubFileActionSuccessMessage(BaseModel):
+class GithubFileActionSuccessMessage(ServerMessage):
     """GitHub file action success message"""
     type: str = "GITHUB_FILE_ACTION_SUCCESS"
     payload: Dict[str, Any]
 
 
-class GithubPullRequestsListMessage(BaseModel):
+class GithubPullRequestsListMessage(ServerMessage):
     """GitHub pull requests list message"""
     type: str = "GITHUB_PULL_REQUESTS_LIST"
     payload: Dict[str, List[Dict[str, Any]]]
 
 
-class GithubPullRequestActionSuccessMessage(BaseModel):
+class GithubPullRequestActionSuccessMessage(ServerMessage):
     """GitHub pull request action success message"""
     type: str = "GITHUB_PULL_REQUEST_ACTION_SUCCESS"
     payload: Dict[str, Any]
 
 
-class GithubActionErrorMessage(BaseModel):
+class GithubActionErrorMessage(ServerMessage):
     """GitHub action error message"""
     type: str = "GITHUB_ACTION_ERROR"
     payload: Dict[str, str]
@@ -344,3 +510,18 @@ class GetFileContentPayload(BaseModel):
     repository_id: str
     file_path: str
     branch: Optional[str] = None
+
+
+# Resolve DirectoryNode's recursive reference now rather than on first validation
+DirectoryNode.model_rebuild()
+
+# Any model still waiting on a forward reference would be built on first use; build it now or fail at import
+for _model in [value for value in globals().values()
+               if isinstance(value, type) and issubclass(value, BaseModel) and value.__module__ == __name__]:
+    if not _model.__pydantic_complete__:
+        _model.model_rebuild(raise_errors=True)
+
+# Template every server message envelope up front
+for _model in ServerMessage.__subclasses__():
+    json_envelope_prefix(_model)
+del _model
@@ -2,21 +2,35 @@
 GitHub integration service
 """
 from typing import List, Dict, Any, Optional, Union
+import hashlib
 import logging
+from ..core.cache import async_lru_ttl
 from ..models.github_model import github_model
 from ..schemas.ws_schemas import (
-    FileNode, FileNodeType, Repository, RepositoryResponse,
+    FileNodeType, RawFileTreeNode, Repository, RepositoryResponse,
     GitHubIssue, GitHubBranch, GitHubPullRequest, FileCommit
 )
 
 logger = logging.getLogger(__name__)
 
 
+def _validation_key(repo_data: Dict[str, Any]) -> bytes:
+    """Cache key for a repository validation; the token is hashed, never stored"""
+    parts = "/".join((
+        repo_data.get("host", "github.com"),
+        repo_data.get("owner") or "",
+        repo_data.get("repo") or "",
+        repo_data.get("branch", "main"),
+        repo_data.get("token") or "",
+    ))
+    return hashlib.blake2b(parts.encode(), digest_size=16).digest()
+
+
 class GitHubService:
     """Service for interacting with GitHub API"""
     
     @staticmethod
-    async def fetch_file_tree(repository_data: Dict[str, Any]) -> List[FileNode]:
+    async def fetch_file_tree(repository_data: Dict[str, Any]) -> List[RawFileTreeNode]:
         """
         Fetch file tree from GitHub repository
         
@@ -27,8 +41,12 @@ class GitHubService:
         return await github_model.fetch_file_tree(repository_data)
     
     @staticmethod
+    @async_lru_ttl(key=_validation_key, maxsize=1024, ttl=60.0)
     async def validate_repository(repo_data: Dict[str, Any]) -> bool:
-        """Validate that a repository exists and is accessible"""
+        """Validate that a repository exists and is accessible
+        
+        Successful validations are cached for 60 seconds.
+        """
         return await github_model.validate_repository(repo_data)
     
     @staticmethod
@@ -1,13 +1,35 @@
 """
 Run script for the backend server
 """
-import uvicorn
+import importlib.util
+import os
+from dotenv import load_dotenv
+
+# Load .env before the settings below (and the protocol module's) are read from the environment;
+# worker processes inherit the loaded variables
+load_dotenv()
+
+import uvicorn  # noqa: E402
+from ws_protocol import TunedWebSocketProtocol  # noqa: E402
+
+# Auto-reload is for local development only (ENV=dev); it watches files and forces one worker
+DEV = os.environ.get("ENV") == "dev"
 
 if __name__ == "__main__":
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=8081,
-        reload=True,
+        reload=DEV,
+        workers=1 if DEV else int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        # uvloop and httptools come with uvicorn[standard]; fall back where they cannot be installed
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        http="httptools" if importlib.util.find_spec("httptools") else "h11",
+        # websockets implementation with tuned, size-gated permessage-deflate
+        ws=TunedWebSocketProtocol,
         log_level="info",
+        # Compress frames on the wire; file tree JSON repeats path prefixes heavily
+        ws_per_message_deflate=os.environ.get("WS_PER_MESSAGE_DEFLATE", "true").lower() != "false",
+        # Largest inbound message accepted (e.g. PUSH_FILES payloads)
+        ws_max_size=int(os.environ.get("WS_MAX_SIZE", 16 * 1024 * 1024)),
     )
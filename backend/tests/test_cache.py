@@ -0,0 +1,41 @@
+"""
+Tests for the in-process caching helpers
+"""
+import asyncio
+from app.core.cache import async_lru_ttl
+
+
+def test_async_lru_ttl_caches_until_invalidated():
+    """Truthy results are reused; invalidate forces a fresh call"""
+    calls = []
+
+    @async_lru_ttl(key=lambda value: value, maxsize=2, ttl=60.0)
+    async def lookup(value):
+        calls.append(value)
+        return value.upper()
+
+    async def scenario():
+        await lookup("a")
+        await lookup("a")
+        lookup.invalidate("a")
+        await lookup("a")
+
+    asyncio.run(scenario())
+    assert calls == ["a", "a"]
+
+
+def test_async_lru_ttl_evicts_least_recently_used_and_skips_falsy():
+    """The oldest entry is evicted past maxsize and falsy results are retried"""
+    calls = []
+
+    @async_lru_ttl(key=lambda value: value, maxsize=2, ttl=60.0)
+    async def lookup(value):
+        calls.append(value)
+        return value
+
+    async def scenario():
+        for value in ("a", "b", "a", "c", "a", "b", "", ""):
+            await lookup(value)
+
+    asyncio.run(scenario())
+    assert calls == ["a", "b", "c", "b", "", ""]
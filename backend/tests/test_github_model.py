@@ -0,0 +1,240 @@
+"""
+Tests for the GitHub repository model
+"""
+# Load app.core first, as the application does, to avoid the models <-> core import cycle
+import app.core  # noqa: F401
+import asyncio
+import importlib
+from types import SimpleNamespace
+import httpx
+from app.core.http_client import http_client
+from app.models.github_model import GitHubModel
+
+
+def test_build_repository_keeps_token_out_of_public_view():
+    """Only the stored document carries the token"""
+    public, doc = GitHubModel._build_repository("client", {
+        "name": "app",
+        "url": "https://github.com/user/app",
+        "owner": "user",
+        "repo": "app",
+        "token": "secret",
+    })
+    assert "token" not in public
+    assert doc == {**public, "token": "secret"}
+    assert public["host"] == "github.com"
+    assert public["branch"] == "main"
+
+
+def test_build_repository_generates_hex_id():
+    """New repositories get a 32-character hex ID; existing IDs are kept"""
+    repo_data = {"name": "app", "url": "https://github.com/user/app", "owner": "user", "repo": "app", "token": "t"}
+    public, _ = GitHubModel._build_repository("client", repo_data)
+    assert len(public["id"]) == 32
+    int(public["id"], 16)
+    public, _ = GitHubModel._build_repository("client", {**repo_data, "id": "keep"})
+    assert public["id"] == "keep"
+
+
+def test_build_file_tree_nests_flat_git_tree_entries():
+    """Flat Git tree paths become nested directory and file nodes"""
+    nodes = GitHubModel._build_file_tree([
+        ("README.md", "blob"),
+        ("src", "tree"),
+        ("src/app", "tree"),
+        ("src/app/main.py", "blob"),
+        ("vendor", "commit"),
+    ])
+    assert [(n.name, n.type.value) for n in nodes] == [("README.md", "file"), ("src", "directory"), ("vendor", "file")]
+    app_dir = nodes[1].children[0]
+    assert app_dir.path == "src/app"
+    assert app_dir.children[0].id == "src/app/main.py"
+    assert not hasattr(app_dir.children[0], "children")
+
+
+def test_directory_walk_keeps_listing_order():
+    """The concurrent fallback walk nests children under the right directories"""
+    listings = {
+        "": [("docs", "dir"), ("a.py", "file"), ("src", "dir")],
+        "docs": [("docs/index.md", "file")],
+        "src": [("src/lib", "dir")],
+        "src/lib": [],
+    }
+
+    class FakeRepo:
+        def get_contents(self, path, ref):
+            return [SimpleNamespace(path=p, name=p.rsplit("/", 1)[-1], type=t) for p, t in listings[path]]
+
+    nodes = asyncio.run(GitHubModel()._get_directory_contents(FakeRepo(), "", "main"))
+    assert [n.path for n in nodes] == ["docs", "a.py", "src"]
+    assert nodes[0].children[0].path == "docs/index.md"
+    assert nodes[2].children[0].path == "src/lib"
+    assert nodes[1].type.value == "file"
+    assert nodes[2].children[0].children == []
+
+
+def test_repository_handles_are_reused(monkeypatch):
+    """The GitHub client and repository handle are fetched once per (host, token, repo)"""
+    github_model_module = importlib.import_module("app.models.github_model")
+
+    fetched = []
+
+    class FakeClient:
+        def get_repo(self, full_name):
+            fetched.append(full_name)
+            return SimpleNamespace(full_name=full_name)
+
+    monkeypatch.setattr(github_model_module, "_get_gh_client", lambda host, token: FakeClient())
+    monkeypatch.setattr(github_model_module, "_repo_cache", github_model_module.OrderedDict())
+    first = github_model_module._get_repo_handle("github.com", "t", "user/app")
+    second = github_model_module._get_repo_handle("github.com", "t", "user/app")
+    github_model_module._get_repo_handle("github.com", "other", "user/app")
+    assert first is second
+    assert fetched == ["user/app", "user/app"]
+    assert all("t" not in key and "other" not in key for key in github_model_module._repo_cache)
+
+
+def test_repository_handle_cache_evicts_least_recently_used(monkeypatch):
+    """Live handles past the size limit are evicted oldest-use first"""
+    github_model_module = importlib.import_module("app.models.github_model")
+    fetched = []
+
+    class FakeClient:
+        def get_repo(self, full_name):
+            fetched.append(full_name)
+            return SimpleNamespace(full_name=full_name)
+
+    monkeypatch.setattr(github_model_module, "_get_gh_client", lambda host, token: FakeClient())
+    monkeypatch.setattr(github_model_module, "_repo_cache", github_model_module.OrderedDict())
+    monkeypatch.setattr(github_model_module, "REPO_HANDLE_CACHE_SIZE", 2)
+    for name in ["user/a", "user/b", "user/a", "user/c", "user/a", "user/b"]:
+        github_model_module._get_repo_handle("github.com", "t", name)
+    assert len(github_model_module._repo_cache) == 2
+    assert fetched == ["user/a", "user/b", "user/c", "user/b"]
+
+
+def test_fetch_file_tree_uses_one_trees_request(monkeypatch):
+    """The tree comes from a single recursive Git Trees API call"""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"truncated": False, "tree": [
+            {"path": "src", "type": "tree"},
+            {"path": "src/main.py", "type": "blob"},
+        ]})
+
+    async def scenario():
+        monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        try:
+            return await GitHubModel().fetch_file_tree({
+                "host": "github.com", "owner": "user", "repo": "app", "branch": "feature/x", "token": "secret",
+            })
+        finally:
+            await http_client.close()
+
+    nodes = asyncio.run(scenario())
+    assert len(requests) == 1
+    assert requests[0].url.raw_path == b"/repos/user/app/git/trees/feature%2Fx?recursive=1"
+    assert requests[0].headers["Authorization"] == "Bearer secret"
+    assert nodes[0].children[0].path == "src/main.py"
+
+
+def test_fetch_file_tree_reuses_unchanged_tree(monkeypatch):
+    """A 304 for the cached ETag returns the previously built tree without rebuilding it"""
+    github_model_module = importlib.import_module("app.models.github_model")
+    monkeypatch.setattr(github_model_module, "_tree_cache", github_model_module.OrderedDict())
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"abc"':
+            return httpx.Response(304)
+        return httpx.Response(200, headers={"ETag": '"abc"'}, json={"truncated": False, "tree": [
+            {"path": "README.md", "type": "blob"},
+        ]})
+
+    async def scenario():
+        monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        repository = {"host": "github.com", "owner": "user", "repo": "app", "branch": "main", "token": "secret"}
+        try:
+            first = await GitHubModel().fetch_file_tree(repository)
+            second = await GitHubModel().fetch_file_tree(repository)
+            return first, second
+        finally:
+            await http_client.close()
+
+    first, second = asyncio.run(scenario())
+    assert second is first
+    assert "If-None-Match" not in requests[0].headers
+    assert requests[1].headers["If-None-Match"] == '"abc"'
+
+
+def test_fetch_file_tree_follows_repository_redirects(monkeypatch):
+    """The shared client follows the redirect GitHub sends for a renamed repository"""
+    import functools
+    http_client_module = importlib.import_module("app.core.http_client")
+
+    def handler(request):
+        if request.url.path.startswith("/repos/user/old-name/"):
+            return httpx.Response(301, headers={"Location": "https://api.github.com/repositories/1/git/trees/main?recursive=1"})
+        return httpx.Response(200, json={"truncated": False, "tree": [{"path": "README.md", "type": "blob"}]})
+
+    async def scenario():
+        transport = httpx.MockTransport(handler)
+        monkeypatch.setattr(http_client_module.httpx, "AsyncClient", functools.partial(httpx.AsyncClient, transport=transport))
+        monkeypatch.setattr(http_client, "_client", None)
+        try:
+            return await GitHubModel().fetch_file_tree({
+                "host": "github.com", "owner": "user", "repo": "old-name", "branch": "main", "token": "secret",
+            })
+        finally:
+            await http_client.close()
+
+    nodes = asyncio.run(scenario())
+    assert nodes[0].path == "README.md"
+
+
+def test_validate_repository_uses_head_request(monkeypatch):
+    """Validation is a single HEAD request; any non-200 answer means invalid"""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200 if request.url.path == "/api/v3/repos/user/app" else 404)
+
+    async def scenario():
+        monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        try:
+            repo_data = {"host": "git.example.com", "owner": "user", "repo": "app", "token": "secret"}
+            return (
+                await GitHubModel().validate_repository(repo_data),
+                await GitHubModel().validate_repository({**repo_data, "repo": "missing"}),
+            )
+        finally:
+            await http_client.close()
+
+    assert asyncio.run(scenario()) == (True, False)
+    assert [request.method for request in requests] == ["HEAD", "HEAD"]
+    assert requests[0].url.host == "git.example.com"
+
+
+def test_error_summary_keeps_only_status_and_message():
+    """Logged GitHub errors leave out the rest of the response body"""
+    from github import GithubException
+
+    error = GithubException(404, {"message": "Not Found", "documentation_url": "https://docs.github.com/" * 50})
+    summary = importlib.import_module("app.models.github_model")._ErrorSummary(error)
+    assert str(summary) == "404 Not Found"
+
+
+def test_public_repository_view_matches_response_schema():
+    """The unvalidated public view has the same shape RepositoryResponse would produce"""
+    from app.schemas.ws_schemas import RepositoryResponse
+
+    public, _ = GitHubModel._build_repository("client", {
+        "name": "app", "url": "https://github.com/user/app", "owner": "user", "repo": "app", "token": "t",
+    })
+    assert RepositoryResponse.model_validate(public).model_dump() == {
+        k: v for k, v in public.items() if k != "client_id"
+    }
@@ -0,0 +1,107 @@
+"""
+Tests for the WebSocket endpoint
+"""
+import inspect
+import msgpack
+import orjson
+from fastapi.testclient import TestClient
+from app.main import app
+from app.api.ws_endpoint import HANDLERS
+
+client = TestClient(app)
+
+
+def test_handlers_are_coroutines():
+    """Every dispatch table entry is an async ConnectionManager method"""
+    for message_type, handler in HANDLERS.items():
+        assert inspect.iscoroutinefunction(handler), message_type
+
+
+def test_ping_pong():
+    """PING is answered with PONG"""
+    with client.websocket_connect("/ws") as websocket:
+        websocket.send_text('{"type": "PING"}')
+        assert websocket.receive_json(mode="binary") == {"type": "PONG"}
+
+
+def test_ping_pong_binary_frame():
+    """Binary frames are parsed the same as text frames"""
+    with client.websocket_connect("/ws") as websocket:
+        websocket.send_bytes(b'{"type": "PING"}')
+        assert websocket.receive_json(mode="binary") == {"type": "PONG"}
+
+
+def test_lowercase_message_type_is_still_dispatched():
+    """Non-canonical message types fall back to uppercase matching"""
+    with client.websocket_connect("/ws") as websocket:
+        websocket.send_text('{"type": "ping"}')
+        assert websocket.receive_json(mode="binary") == {"type": "PONG"}
+
+
+
+def test_non_canonical_types_are_tracked_per_canonical_type(monkeypatch):
+    """Any number of casings of one type is remembered once, so clients cannot grow the set"""
+    from app.api import ws_endpoint
+    monkeypatch.setattr(ws_endpoint, "_warned_types", set())
+    for variant in ["ping", "Ping", "pInG", "sUbMiT_cOnFiG", "submit_config", "not_a_type"]:
+        ws_endpoint.normalize_message_type(variant)
+    assert ws_endpoint._warned_types == {"PING", "SUBMIT_CONFIG"}
+
+def test_msgpack_subprotocol():
+    """Clients offering the msgpack subprotocol exchange MessagePack frames"""
+    with client.websocket_connect("/ws", subprotocols=["msgpack"]) as websocket:
+        assert websocket.accepted_subprotocol == "msgpack"
+        websocket.send_bytes(msgpack.packb({"type": "PING"}))
+        assert msgpack.unpackb(websocket.receive_bytes()) == {"type": "PONG"}
+
+
+def receive_until_pong(websocket):
+    """Messages received before the PONG, unpacking coalesced frames"""
+    messages = []
+    while True:
+        frame = websocket.receive_json(mode="binary")
+        for message in frame if isinstance(frame, list) else [frame]:
+            if message == {"type": "PONG"}:
+                return messages
+            messages.append(message)
+
+
+def test_messages_are_validated_before_dispatch(monkeypatch):
+    """Handlers get the validated payload as a dict; invalid payloads are answered with an error"""
+    received = []
+
+    async def fake_add_repository(manager, client_id, payload):
+        received.append(payload)
+
+    monkeypatch.setitem(HANDLERS, "ADD_REPOSITORY", fake_add_repository)
+    repository = {"name": "app", "url": "u", "owner": "user", "repo": "app", "token": "t"}
+    with client.websocket_connect("/ws") as websocket:
+        websocket.send_text('{"type": "ADD_REPOSITORY", "payload": {"repository": {"name": "app"}}}')
+        websocket.send_text(orjson.dumps({"type": "ADD_REPOSITORY", "payload": {"repository": repository}}).decode())
+        websocket.send_text('{"type": "PING"}')
+        errors = receive_until_pong(websocket)
+    # Unset fields such as the repository id are not filled in with defaults
+    assert received == [{"repository": repository}]
+    assert [error["type"] for error in errors] == ["REPOSITORY_ACTION_ERROR"]
+
+
+def test_invalid_message_gets_its_error_reply():
+    """An invalid ADD_REPOSITORY is answered with REPOSITORY_ACTION_ERROR naming the bad fields only"""
+    with client.websocket_connect("/ws") as websocket:
+        websocket.send_text('{"type": "ADD_REPOSITORY", "payload": {"repository": {"name": "app", "token": "secret"}}}')
+        websocket.send_text('{"type": "PING"}')
+        errors = receive_until_pong(websocket)
+    assert len(errors) == 1
+    assert errors[0]["type"] == "REPOSITORY_ACTION_ERROR"
+    assert "repository.url" in errors[0]["payload"]["message"]
+    assert "secret" not in errors[0]["payload"]["message"]
+
+
+def test_undecodable_frame_is_not_logged(caplog):
+    """Frames that are not valid JSON are logged by kind and length, never by content"""
+    with client.websocket_connect("/ws") as websocket:
+        websocket.send_text('{"token": "secret"')
+        websocket.send_text('{"type": "PING"}')
+        receive_until_pong(websocket)
+    assert "Invalid text frame" in caplog.text
+    assert "secret" not in caplog.text
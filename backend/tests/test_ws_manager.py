@@ -0,0 +1,320 @@
+"""
+Tests for the WebSocket connection manager
+"""
+import asyncio
+import msgpack
+import orjson
+from starlette.websockets import WebSocketState
+from app.core import ws_manager
+from app.core.ws_manager import CachedMessage, ClientState, ConnectionManager
+from app.schemas.ws_schemas import ConfigErrorMessage, RawDirectoryNode, RawFileLeaf
+
+
+class FakeWebSocket:
+    """Collects frames sent by the manager"""
+
+    def __init__(self):
+        self.sent = []
+        self.application_state = WebSocketState.CONNECTED
+        self.client_state = WebSocketState.CONNECTED
+        self.close_code = None
+
+    async def close(self, code=1000):
+        self.close_code = code
+
+    async def send_bytes(self, data):
+        self.sent.append(orjson.loads(data))
+
+    @property
+    def messages(self):
+        """Sent messages with coalesced frames flattened"""
+        flat = []
+        for frame in self.sent:
+            flat.extend(frame if isinstance(frame, list) else [frame])
+        return flat
+
+
+async def flush_writes():
+    """Give client writer tasks time to send what they have queued"""
+    await asyncio.sleep(ws_manager.WRITE_DELAY * 10)
+
+
+def test_disconnects_are_flushed_in_one_batch(monkeypatch):
+    """Disconnects arriving together are recorded with a single update"""
+    batches = []
+
+    async def fake_remove_connections(client_ids):
+        batches.append(client_ids)
+
+    monkeypatch.setattr(ws_manager.db, "remove_connections", fake_remove_connections)
+
+    async def scenario():
+        manager = ConnectionManager()
+        await manager.start()
+        for client_id in ("a", "b", "c"):
+            manager.disconnect(client_id)
+        await asyncio.sleep(ws_manager.DISCONNECT_FLUSH_DELAY * 5)
+        await manager.stop()
+
+    asyncio.run(scenario())
+    assert batches == [["a", "b", "c"]]
+
+
+def test_repository_lookups_are_cached(monkeypatch):
+    """Repeated lookups reuse the cached document until invalidated"""
+    calls = []
+
+    async def fake_get_repository(client_id, repository_id):
+        calls.append((client_id, repository_id))
+        return {"id": repository_id}
+
+    monkeypatch.setattr(ws_manager.github_model, "get_repository_internal", fake_get_repository)
+
+    async def scenario():
+        manager = ConnectionManager()
+        manager.clients["client"] = ClientState(FakeWebSocket())
+        await manager._get_repository_cached("client", "repo")
+        await manager._get_repository_cached("client", "repo")
+        manager._invalidate_repository("client", "repo")
+        await manager._get_repository_cached("client", "repo")
+
+    asyncio.run(scenario())
+    assert calls == [("client", "repo"), ("client", "repo")]
+
+
+def test_repository_listing_is_mutated_in_place(monkeypatch):
+    """Add/update/delete apply to the cached listing without reloading it"""
+    loads = []
+
+    async def fake_get_repositories(client_id):
+        loads.append(client_id)
+        return [{"id": "1", "name": "one"}]
+
+    monkeypatch.setattr(ws_manager.github_model, "get_repositories", fake_get_repositories)
+
+    async def scenario():
+        manager = ConnectionManager()
+        manager.clients["client"] = ClientState(FakeWebSocket())
+        await manager._get_repositories_cached("client")
+        manager._upsert_repository_listing("client", {"id": "2", "name": "two"})
+        manager._upsert_repository_listing("client", {"id": "1", "name": "one", "branch": "dev"})
+        manager._remove_repository_listing("client", "2")
+        return await manager._get_repositories_cached("client")
+
+    repos = asyncio.run(scenario())
+    assert repos == [{"id": "1", "name": "one", "branch": "dev"}]
+    assert loads == ["client"]
+
+
+def test_fetch_files_sends_tree_and_typing_off(monkeypatch):
+    """The spliced file tree message is valid JSON and is followed by typing-off"""
+    tree = [
+        RawDirectoryNode(id="src", name="src", path="src", children=[
+            RawFileLeaf(id="src/main.py", name="main.py", path="src/main.py"),
+        ]),
+    ]
+
+    async def fake_fetch_file_tree(repository):
+        return tree
+
+    monkeypatch.setattr(ws_manager.github_model, "fetch_file_tree", fake_fetch_file_tree)
+    repository = {
+        "id": "1", "name": "app", "url": "https://github.com/user/app", "host": "github.com",
+        "owner": "user", "repo": "app", "branch": "main", "token": "secret",
+    }
+
+    async def scenario():
+        manager = ConnectionManager()
+        websocket = FakeWebSocket()
+        manager.clients["client"] = ClientState(websocket)
+        await manager.handle_fetch_files("client", {"repository_id": "1"}, repository=repository)
+        await flush_writes()
+        return websocket.messages
+
+    messages = asyncio.run(scenario())
+    tree_message, typing_off = messages[-2:]
+    assert tree_message["type"] == "FILE_TREE_DATA"
+    assert tree_message["payload"]["tree"][0]["children"][0]["path"] == "src/main.py"
+    assert "children" not in tree_message["payload"]["tree"][0]["children"][0]
+    assert "token" not in tree_message["payload"]["repository"]
+    assert typing_off == {"type": "AGENT_TYPING", "payload": {"isTyping": False}}
+
+
+def test_disconnect_drops_all_client_state():
+    """Disconnecting removes the client's socket, selection and caches together"""
+    manager = ConnectionManager()
+    manager.clients["client"] = ClientState(FakeWebSocket())
+    manager._set_selected_repository("client", "repo")
+    manager.disconnect("client")
+    assert "client" not in manager.clients
+    assert manager._get_selected_repository("client") is None
+
+
+def test_chat_message_frames(monkeypatch):
+    """A chat turn sends typing-on, typing-off and the reply in order"""
+    async def fake_add_message(client_id, sender, text):
+        return {"id": "m", "sender": sender, "text": text, "timestamp": 0, "client_id": client_id}
+
+    async def fake_get_connection_config(client_id):
+        return None
+
+    monkeypatch.setattr(ws_manager.db, "add_message", fake_add_message)
+    monkeypatch.setattr(ws_manager.db, "get_connection_config", fake_get_connection_config)
+
+    async def scenario():
+        manager = ConnectionManager()
+
+        async def fake_process_message(text, config):
+            return "reply"
+
+        manager.ai_service.process_message = fake_process_message
+        websocket = FakeWebSocket()
+        manager.clients["client"] = ClientState(websocket)
+        await manager.handle_chat_message("client", {"text": "hello"})
+        await flush_writes()
+        return websocket.messages
+
+    messages = asyncio.run(scenario())
+    assert messages[0] == {"type": "AGENT_TYPING", "payload": {"isTyping": True}}
+    assert messages[1] == {"type": "AGENT_TYPING", "payload": {"isTyping": False}}
+    assert messages[2]["type"] == "NEW_CHAT_MESSAGE"
+    assert messages[2]["payload"]["text"] == "reply"
+
+
+def test_queued_messages_are_coalesced_into_one_frame():
+    """Messages queued together go out as a single JSON array frame"""
+    async def scenario():
+        manager = ConnectionManager()
+        websocket = FakeWebSocket()
+        manager.clients["client"] = ClientState(websocket)
+        await manager.send_personal_message({"type": "A"}, "client")
+        await manager._send_raw(b'{"type":"B"}', "client")
+        await flush_writes()
+        await manager.send_personal_message({"type": "C"}, "client")
+        await flush_writes()
+        manager.disconnect("client")
+        return websocket.sent
+
+    sent = asyncio.run(scenario())
+    assert sent == [[{"type": "A"}, {"type": "B"}], {"type": "C"}]
+
+
+def test_ai_service_configured_only_when_token_changes(monkeypatch):
+    """Resubmitting the same Gemini key does not reconfigure the AI service"""
+    async def noop(*args):
+        return []
+
+    monkeypatch.setattr(ws_manager.db, "update_connection_config", noop)
+    monkeypatch.setattr(ws_manager.github_model, "add_repositories", noop)
+    monkeypatch.setattr(ws_manager.github_model, "get_repositories", noop)
+    configured = []
+
+    async def scenario():
+        manager = ConnectionManager()
+        manager.ai_service.configure = configured.append
+        manager.clients["client"] = ClientState(FakeWebSocket())
+        for token in ("one", "one", "two"):
+            await manager.handle_submit_config("client", {"geminiToken": token})
+
+    asyncio.run(scenario())
+    assert configured == ["one", "two"]
+
+
+def test_sending_to_closed_socket_reaps_client():
+    """A send to a socket that has gone away drops the client instead of raising"""
+    async def scenario():
+        manager = ConnectionManager()
+        websocket = FakeWebSocket()
+        manager.clients["client"] = ClientState(websocket)
+        websocket.client_state = WebSocketState.DISCONNECTED
+        await manager.send_personal_message({"type": "A"}, "client")
+        await flush_writes()
+        return manager, websocket.sent
+
+    manager, sent = asyncio.run(scenario())
+    assert sent == []
+    assert "client" not in manager.clients
+    assert manager._disconnect_queue.get_nowait() == "client"
+
+
+def test_msgpack_clients_get_coalesced_msgpack_arrays():
+    """Coalesced frames for MessagePack clients are MessagePack arrays"""
+    frames = []
+
+    class MsgpackWebSocket(FakeWebSocket):
+        async def send_bytes(self, data):
+            frames.append(msgpack.unpackb(data))
+
+    async def scenario():
+        manager = ConnectionManager()
+        manager.clients["client"] = ClientState(MsgpackWebSocket(), use_msgpack=True)
+        await manager.send_cached(ws_manager.TYPING_ON, "client")
+        await manager.send_personal_message({"type": "A"}, "client")
+        await flush_writes()
+        manager.disconnect("client")
+
+    asyncio.run(scenario())
+    assert frames == [[{"type": "AGENT_TYPING", "payload": {"isTyping": True}}, {"type": "A"}]]
+
+
+def test_cached_message_encodes_once_per_format(monkeypatch):
+    """A cached message sent to several JSON clients is serialized once"""
+    dumps = []
+    real_dumps = orjson.dumps
+
+    def counting_dumps(obj, *args, **kwargs):
+        dumps.append(obj)
+        return real_dumps(obj, *args, **kwargs)
+
+    monkeypatch.setattr(ws_manager.orjson, "dumps", counting_dumps)
+
+    async def scenario():
+        manager = ConnectionManager()
+        sockets = [FakeWebSocket() for _ in range(3)]
+        for index, websocket in enumerate(sockets):
+            manager.clients[str(index)] = ClientState(websocket)
+        cached = CachedMessage({"type": "REPOSITORIES_LIST", "payload": {"repositories": []}})
+        for client_id in list(manager.clients):
+            await manager.send_cached(cached, client_id)
+        await flush_writes()
+        for client_id in list(manager.clients):
+            manager.disconnect(client_id)
+        return sockets
+
+    sockets = asyncio.run(scenario())
+    assert len(dumps) == 1
+    assert all(s.sent == [{"type": "REPOSITORIES_LIST", "payload": {"repositories": []}}] for s in sockets)
+
+
+def test_schema_models_are_encoded_with_orjson():
+    """ws_schemas message models can be sent as-is"""
+    async def scenario():
+        manager = ConnectionManager()
+        websocket = FakeWebSocket()
+        manager.clients["client"] = ClientState(websocket)
+        await manager.send_personal_message(ConfigErrorMessage(payload={"message": "bad"}), "client")
+        await flush_writes()
+        manager.disconnect("client")
+        return websocket.sent
+
+    assert asyncio.run(scenario()) == [{"type": "CONFIG_ERROR", "payload": {"message": "bad"}}]
+
+
+def test_slow_client_is_closed_when_outbox_fills(monkeypatch):
+    """A client whose writer cannot keep up is dropped instead of buffering without limit"""
+    monkeypatch.setattr(ws_manager, "OUTBOX_SIZE", 3)
+
+    async def scenario():
+        manager = ConnectionManager()
+        websocket = FakeWebSocket()
+        manager.clients["client"] = ClientState(websocket)
+        # Nothing is sent until the writer gets a turn, so the fourth message overflows
+        for index in range(4):
+            await manager.send_personal_message({"type": str(index)}, "client")
+        await flush_writes()
+        return manager, websocket
+
+    manager, websocket = asyncio.run(scenario())
+    assert "client" not in manager.clients
+    assert websocket.close_code == 1013
+    assert websocket.sent == []
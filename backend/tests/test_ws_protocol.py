@@ -0,0 +1,49 @@
+"""
+Tests for the tuned permessage-deflate extension
+"""
+import zlib
+from websockets.frames import Frame, OP_BINARY, OP_CONT
+from ws_protocol import MIN_COMPRESS_SIZE, DEFLATE_WINDOW_BITS, SizeGatedPerMessageDeflate, TunedDeflateFactory
+
+
+def test_deflate_negotiates_tuned_window_and_skips_small_frames():
+    """Small messages go out uncompressed, large ones are deflated"""
+    response_params, extension = TunedDeflateFactory().process_request_params([], [])
+    assert ("server_max_window_bits", str(DEFLATE_WINDOW_BITS)) in response_params
+
+    small = extension.encode(Frame(OP_BINARY, b"x" * (MIN_COMPRESS_SIZE - 1)))
+    assert not small.rsv1
+    large = extension.encode(Frame(OP_BINARY, b'{"path":"src/app/"}' * 100))
+    assert large.rsv1
+    assert len(large.data) < 1900
+
+
+
+def test_small_final_fragment_of_compressed_message_is_compressed():
+    """A fragmented message is compressed throughout, however small its last fragment"""
+    _, extension = TunedDeflateFactory().process_request_params([], [])
+    first = extension.encode(Frame(OP_BINARY, b"x" * 2000, fin=False))
+    last = extension.encode(Frame(OP_CONT, b"y" * 10))
+    assert first.rsv1
+    # The receiver inflates the fragments as one stream, per RFC 7692
+    inflated = zlib.decompressobj(-15).decompress(first.data + last.data + b"\x00\x00\xff\xff")
+    assert inflated == b"x" * 2000 + b"y" * 10
+
+def test_extension_is_built_from_negotiated_parameters():
+    """Client-requested parameters carry over to the size-gated extension"""
+    response_params, extension = TunedDeflateFactory().process_request_params(
+        [("client_max_window_bits", "10"), ("client_no_context_takeover", None)], []
+    )
+    assert isinstance(extension, SizeGatedPerMessageDeflate)
+    assert extension.remote_max_window_bits == 10
+    assert extension.remote_no_context_takeover
+    assert extension.local_max_window_bits == DEFLATE_WINDOW_BITS
+
+
+def test_protocol_module_does_not_load_the_app():
+    """run.py imports the protocol in the supervisor, which must not import the application"""
+    import subprocess
+    import sys
+    from pathlib import Path
+    code = "import sys, ws_protocol; sys.exit('app' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).parents[1]).returncode == 0
@@ -0,0 +1,77 @@
+"""
+Tests for the WebSocket message schemas
+"""
+from typing import get_args
+import pytest
+from pydantic import TypeAdapter, ValidationError
+import app.core  # noqa: F401
+from app.api.ws_endpoint import HANDLERS
+import orjson
+from app.schemas.ws_schemas import (
+    ClientMessage, DirectoryNode, FetchFilesMessage, FetchFilesPayload, FileLeaf, FileTreeNode,
+    RawDirectoryNode, RawFileLeaf, AgentTypingMessage, FileTreeDataMessage, json_envelope_prefix,
+)
+
+adapter = TypeAdapter(ClientMessage)
+
+
+def test_every_handled_type_has_an_envelope():
+    """Each dispatched message type maps to exactly one ClientMessage variant"""
+    union, _ = get_args(ClientMessage)
+    tags = [get_args(model.model_fields["type"].annotation)[0] for model in get_args(union)]
+    assert len(tags) == len(set(tags))
+    assert set(tags) == set(HANDLERS) | {"PING", "PONG"}
+
+
+def test_payload_is_validated_against_its_type():
+    """The type tag selects the payload model"""
+    message = adapter.validate_python({"type": "FETCH_FILES", "payload": {"repository_id": "1"}})
+    assert isinstance(message, FetchFilesMessage)
+    assert message.payload == FetchFilesPayload(repository_id="1")
+    with pytest.raises(ValidationError):
+        adapter.validate_python({"type": "FETCH_FILES", "payload": {"text": "hi"}})
+    with pytest.raises(ValidationError):
+        adapter.validate_python({"type": "NOT_A_TYPE", "payload": {}})
+
+
+
+def test_optional_handler_fields_are_optional():
+    """Fields the handlers default are not required by the schemas"""
+    for message in [
+        {"type": "SUBMIT_CONFIG", "payload": {}},
+        {"type": "SEND_CHAT_MESSAGE", "payload": {}},
+        {"type": "CREATE_ISSUE", "payload": {"repository_id": "1", "title": "Bug"}},
+        {"type": "CREATE_PULL_REQUEST", "payload": {
+            "repository_id": "1", "title": "Fix", "head_branch": "fix", "base_branch": "main",
+        }},
+    ]:
+        adapter.validate_python(message)
+
+def test_raw_tree_matches_file_tree_schema():
+    """Server-built trees serialize to valid FileTreeNode lists; leaves have no children"""
+    raw = [RawDirectoryNode(id="src", name="src", path="src", children=[
+        RawFileLeaf(id="src/main.py", name="main.py", path="src/main.py"),
+    ])]
+    tree = TypeAdapter(list[FileTreeNode]).validate_json(orjson.dumps(raw))
+    assert isinstance(tree[0], DirectoryNode)
+    assert isinstance(tree[0].children[0], FileLeaf)
+
+
+def test_server_messages_are_frozen_and_templated():
+    """Server messages are immutable, reject unknown fields and expose their JSON envelope prefix"""
+    message = AgentTypingMessage(payload={"isTyping": True})
+    with pytest.raises(ValidationError):
+        message.type = "OTHER"
+    with pytest.raises(ValidationError):
+        AgentTypingMessage(payload={"isTyping": True}, extra=1)
+    spliced = json_envelope_prefix(FileTreeDataMessage) + b'{"tree":[]}}'
+    assert orjson.loads(spliced) == {"type": "FILE_TREE_DATA", "payload": {"tree": []}}
+
+
+def test_schemas_are_built_at_import():
+    """No model or envelope template is left to build on the first message"""
+    from pydantic import BaseModel
+    from app.schemas import ws_schemas
+    models = [v for v in vars(ws_schemas).values() if isinstance(v, type) and issubclass(v, BaseModel) and v is not BaseModel]
+    assert all(model.__pydantic_complete__ for model in models)
+    assert ws_schemas.json_envelope_prefix.cache_info().currsize >= len(ws_schemas.ServerMessage.__subclasses__())
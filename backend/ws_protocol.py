@@ -0,0 +1,67 @@
+"""
+Uvicorn WebSocket protocol with tuned permessage-deflate
+
+Kept outside the app package so run.py can pass it to uvicorn without
+importing the application into the supervisor process.
+"""
+import os
+from typing import Any, List, Sequence, Tuple
+from uvicorn.protocols.websockets.websockets_impl import WebSocketProtocol
+from websockets import frames
+from websockets.extensions.permessage_deflate import PerMessageDeflate, ServerPerMessageDeflateFactory
+
+# Messages smaller than this are sent uncompressed; deflating tiny frames costs more CPU than it saves
+MIN_COMPRESS_SIZE = int(os.environ.get("WS_DEFLATE_MIN_SIZE", 512))
+
+# zlib compression level (1 fastest .. 9 smallest)
+DEFLATE_LEVEL = int(os.environ.get("WS_DEFLATE_LEVEL", 6))
+
+# 4 KiB compression window and a smaller zlib memLevel keep per-connection memory low
+DEFLATE_WINDOW_BITS = 12
+DEFLATE_MEM_LEVEL = 5
+
+COMPRESS_SETTINGS = {"level": DEFLATE_LEVEL, "memLevel": DEFLATE_MEM_LEVEL}
+
+
+class SizeGatedPerMessageDeflate(PerMessageDeflate):
+    """permessage-deflate that leaves small messages uncompressed"""
+
+    def encode(self, frame: frames.Frame) -> frames.Frame:
+        # RFC 7692 allows uncompressed messages (RSV1 unset) on a deflate connection; only whole,
+        # unfragmented messages qualify, as continuation frames must match their first fragment
+        if frame.opcode in (frames.OP_TEXT, frames.OP_BINARY) and frame.fin and len(frame.data) < MIN_COMPRESS_SIZE:
+            return frame
+        return super().encode(frame)
+
+
+class TunedDeflateFactory(ServerPerMessageDeflateFactory):
+    """Negotiates deflate with the tuned window and builds size-gated extensions"""
+
+    def __init__(self):
+        super().__init__(
+            server_max_window_bits=DEFLATE_WINDOW_BITS,
+            compress_settings=COMPRESS_SETTINGS,
+        )
+
+    def process_request_params(
+        self, params: Sequence[Tuple[str, Any]], accepted_extensions: Sequence[Any]
+    ) -> Tuple[List[Tuple[str, Any]], PerMessageDeflate]:
+        # Let the parent negotiate, then build the extension from the agreed parameters
+        response_params, _ = super().process_request_params(params, accepted_extensions)
+        negotiated = dict(response_params)
+        return response_params, SizeGatedPerMessageDeflate(
+            "client_no_context_takeover" in negotiated,  # remote_no_context_takeover
+            "server_no_context_takeover" in negotiated,  # local_no_context_takeover
+            int(negotiated.get("client_max_window_bits") or 15),  # remote_max_window_bits
+            int(negotiated.get("server_max_window_bits") or 15),  # local_max_window_bits
+            COMPRESS_SETTINGS,
+        )
+
+
+class TunedWebSocketProtocol(WebSocketProtocol):
+    """Uvicorn's websockets protocol, with the tuned deflate extension when enabled"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.config.ws_per_message_deflate:
+            self.available_extensions = [TunedDeflateFactory()]